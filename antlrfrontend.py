@@ -0,0 +1,62 @@
+from antlr4 import InputStream, CommonTokenStream
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from antlr.GrammarLexer import GrammarLexer
+from antlr.GrammarParser import GrammarParser
+
+
+
+class SyntaxErrorListener(ErrorListener):
+    def __init__(self):
+        super(SyntaxErrorListener, self).__init__()
+        self.errors = []
+
+    def syntaxError(self, _, __, line, ___, msg, ____):
+        self.errors.append(f"Syntax error at line {line} {msg}")
+
+
+class AntlrParser:
+    def __init__(self):
+        self.parser = None
+        self.parses = 0
+        self.fullParses = 0
+
+    def _create(self):
+        self.lexer = GrammarLexer(InputStream(""))
+        self.tokenStream = CommonTokenStream(self.lexer)
+        self.parser = GrammarParser(self.tokenStream)
+        self.parser.removeErrorListeners()
+
+    def _resetFollowSets(self):
+        for state in GrammarParser.atn.states:
+            state.nextTokenWithinRule = None
+
+    def parse(self, source: str):
+        if self.parser is None:
+            self._create()
+        self._resetFollowSets()
+        self.lexer.inputStream = InputStream(source)
+        self.tokenStream.setTokenSource(self.lexer)
+        self.parser.setTokenStream(self.tokenStream)
+        self.parses += 1
+        self.parser._interp.predictionMode = PredictionMode.SLL
+        self.parser._errHandler = BailErrorStrategy()
+        try:
+            return self.parser.program(), []
+        except ParseCancellationException:
+            self.fullParses += 1
+        self.parser.reset()
+        self.parser._interp.predictionMode = PredictionMode.LL
+        self.parser._errHandler = DefaultErrorStrategy()
+        errorListener = SyntaxErrorListener()
+        self.parser.addErrorListener(errorListener)
+        try:
+            tree = self.parser.program()
+        finally:
+            self.parser.removeErrorListeners()
+        return tree, errorListener.errors
+
+    def formatStats(self):
+        return f"Parser: {self.fullParses} of {self.parses} files needed full LL prediction"
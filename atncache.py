@@ -0,0 +1,123 @@
+import hashlib
+import io
+import os
+import pickle
+import sys
+import tempfile
+from antlr4.PredictionContext import PredictionContext
+from antlr4.atn.ATNSimulator import ATNSimulator
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.atn.SemanticContext import SemanticContext
+from antlr.GrammarLexer import GrammarLexer
+from antlr.GrammarParser import GrammarParser
+from cache import defaultCacheDirectory
+
+
+
+grammarSources = ["antlr/GrammarLexer.py", "antlr/GrammarParser.py"]
+
+
+def grammarHash():
+    digest = hashlib.sha256()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name in grammarSources:
+        with open(os.path.join(root, name), "rb") as sourceFile:
+            digest.update(sourceFile.read())
+    digest.update(sys.version.encode())
+    return digest.hexdigest()
+
+
+def defaultAtnCachePath():
+    return os.path.join(defaultCacheDirectory(), f"atn-{grammarHash()[:16]}.pickle")
+
+
+def _sharedObjects():
+    objects = {
+        ("none",): SemanticContext.NONE, ("empty",): PredictionContext.EMPTY,
+        ("error",): ATNSimulator.ERROR, ("lexerError",): LexerATNSimulator.ERROR
+    }
+    for owner, atn in (("lexer", GrammarLexer.atn), ("parser", GrammarParser.atn)):
+        for state in atn.states:
+            objects[(owner, "state", state.stateNumber)] = state
+    for idx, action in enumerate(GrammarLexer.atn.lexerActions or []):
+        objects[("lexer", "action", idx)] = action
+    return objects
+
+
+class SnapshotPickler(pickle.Pickler):
+    def __init__(self, file):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.references = {id(value): key for key, value in _sharedObjects().items()}
+
+    def persistent_id(self, obj):
+        return self.references.get(id(obj))
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file):
+        super().__init__(file)
+        self.objects = _sharedObjects()
+
+    def persistent_load(self, key):
+        return self.objects[tuple(key)]
+
+
+def _rehashExecutor(executor):
+    if executor is not None:
+        executor.hashCode = hash("".join(str(action) for action in executor.lexerActions))
+
+
+def _rehash(dfas: list):
+    for dfa in dfas:
+        for state in dfa._states:
+            _rehashExecutor(state.lexerActionExecutor)
+            state.configs.cachedHashCode = -1
+            for config in state.configs:
+                _rehashExecutor(getattr(config, "lexerActionExecutor", None))
+        dfa._states = {state: state for state in dfa._states}
+
+
+def dfaSize():
+    return sum(len(dfa._states) for dfa in GrammarLexer.decisionsToDFA + GrammarParser.decisionsToDFA)
+
+
+def restoreAtnCache(path: str):
+    try:
+        with open(path, "rb") as cacheFile:
+            data = cacheFile.read()
+    except OSError:
+        return False
+    header = grammarHash().encode()
+    if not data.startswith(header):
+        return False
+    try:
+        lexerDfa, parserDfa, contextCache = SnapshotUnpickler(io.BytesIO(data[len(header):])).load()
+    except Exception:
+        return False
+    _rehash(lexerDfa + parserDfa)
+    GrammarLexer.decisionsToDFA[:] = lexerDfa
+    GrammarParser.decisionsToDFA[:] = parserDfa
+    GrammarParser.sharedContextCache.cache = {context: context for context in contextCache.cache}
+    return True
+
+
+def saveAtnCache(path: str):
+    snapshot = io.BytesIO()
+    snapshot.write(grammarHash().encode())
+    try:
+        SnapshotPickler(snapshot).dump(
+            (GrammarLexer.decisionsToDFA, GrammarParser.decisionsToDFA, GrammarParser.sharedContextCache)
+        )
+    except RecursionError:
+        return False
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporaryPath = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(descriptor, "wb") as temporaryFile:
+            temporaryFile.write(snapshot.getvalue())
+        os.replace(temporaryPath, path)
+    except BaseException:
+        os.unlink(temporaryPath)
+        raise
+    return True
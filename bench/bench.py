@@ -0,0 +1,233 @@
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bytecode import decodeProgram, readProgram, writeInstructions
+from cli import parseArguments
+from compiler import codegenOptions, compileSource
+from interpreter import Interpreter, Profiler
+from programs import workloads
+from streams import InputReader, OutputWriter
+
+
+
+metrics = [
+    ("compile.parse", False), ("compile.codegen", False), ("compile.optimize", False),
+    ("compile.total", False), ("compile.first", False),
+    ("load.text", False), ("load.binary", False),
+    ("run.instructions", False), ("run.time", False), ("run.instructionsPerSecond", True),
+    ("memory.compile", False), ("memory.run", False)
+]
+timeFloor = 0.001
+
+
+def compileWorkload(source: str, options: dict, phaseTimes: dict = None):
+    messages, instructions = compileSource(source, options, phaseTimes)
+    if instructions is None:
+        raise ValueError("\n".join(messages))
+    return instructions
+
+
+def measureCompile(source: str, options: dict, repeat: int):
+    start = time.perf_counter()
+    compileWorkload(source, options)
+    first = time.perf_counter() - start
+    samples = list()
+    for _ in range(repeat):
+        phaseTimes = dict()
+        start = time.perf_counter()
+        compileWorkload(source, options, phaseTimes)
+        phaseTimes["total"] = time.perf_counter() - start
+        samples.append(phaseTimes)
+    result = {phase: statistics.median(sample[phase] for sample in samples) for phase in samples[0]}
+    result["first"] = first
+    return result
+
+
+def measureLoad(instructions: list[str], repeat: int):
+    result = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        for programFormat in ("text", "binary"):
+            path = os.path.join(directory, f"program.{programFormat}")
+            writeInstructions(path, instructions, programFormat == "binary")
+            samples = list()
+            for _ in range(repeat):
+                start = time.perf_counter()
+                readProgram(path)
+                samples.append(time.perf_counter() - start)
+            result[programFormat] = statistics.median(samples)
+    return result
+
+
+def countInstructions(program, stdin: str):
+    profiler = Profiler(program)
+    with open(os.devnull, "wb") as sink:
+        profiler.run(program, InputReader(buffer=stdin.encode()), OutputWriter(sink, "exit"))
+    return sum(profiler.counts)
+
+
+def measureRun(program, stdin: str, engine: str, repeat: int):
+    interpreter = Interpreter(program, engine)
+    samples = list()
+    with open(os.devnull, "wb") as sink:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            interpreter.run(stdin, sink)
+            samples.append(time.perf_counter() - start)
+    instructions = countInstructions(program, stdin)
+    elapsed = statistics.median(samples)
+    return {"instructions": instructions, "time": elapsed, "instructionsPerSecond": instructions / elapsed}
+
+
+def measureMemory(source: str, options: dict, program, stdin: str, engine: str):
+    tracemalloc.start()
+    try:
+        compileWorkload(source, options)
+        compilePeak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        with open(os.devnull, "wb") as sink:
+            Interpreter(program, engine).run(stdin, sink)
+        runPeak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return {"compile": compilePeak, "run": runPeak}
+
+
+def benchmarkWorkload(name: str, options: dict, scale: float, repeat: int):
+    source, stdin = workloads[name](scale)
+    engine = options.get("engine", "match")
+    compileResult = measureCompile(source, options, repeat)
+    instructions = compileWorkload(source, options)
+    program = decodeProgram(instructions)
+    return {
+        "sourceLines": source.count("\n"),
+        "programSize": len(program.opcodes),
+        "compile": compileResult,
+        "load": measureLoad(instructions, repeat),
+        "run": measureRun(program, stdin, engine, repeat),
+        "memory": measureMemory(source, options, program, stdin, engine)
+    }
+
+
+def formatRow(name: str, result: dict):
+    compileResult, runResult = result["compile"], result["run"]
+    return (
+        f"{name:<12} {compileResult['parse'] * 1000:>9.1f} {compileResult['codegen'] * 1000:>9.1f} "
+        f"{compileResult['optimize'] * 1000:>9.1f} {result['load']['binary'] * 1000:>8.2f} "
+        f"{runResult['time'] * 1000:>9.1f} {runResult['instructionsPerSecond'] / 1e6:>7.2f} "
+        f"{result['memory']['run'] / 1024:>9.0f}"
+    )
+
+
+def runBenchmarks(names: list[str], options: dict):
+    scale, repeat = float(options.get("scale", 1)), int(options.get("repeat", 5))
+    codegen = {name: options[name] for name in codegenOptions if name in options}
+    settings = dict(codegen, engine=options.get("engine", "match"), frontend=options.get("frontend", "antlr"))
+    results = {
+        "python": platform.python_version(), "implementation": platform.python_implementation(),
+        "machine": platform.machine(), "scale": scale, "repeat": repeat, "options": settings,
+        "workloads": dict()
+    }
+    print(f"{'workload':<12} {'parse ms':>9} {'codegen':>9} {'optimize':>9} {'load ms':>8} {'run ms':>9} {'Minst/s':>7} {'run KiB':>9}")
+    for name in names:
+        results["workloads"][name] = benchmarkWorkload(name, settings, scale, repeat)
+        print(formatRow(name, results["workloads"][name]))
+    if options.get("out"):
+        with open(options["out"], "w") as resultFile:
+            json.dump(results, resultFile, indent=2)
+
+
+def runScaling(names: list[str], options: dict):
+    scales = [float(scale) for scale in options.get("scales", "1,2,4,8").split(",")]
+    repeat = int(options.get("repeat", 5))
+    codegen = {name: options[name] for name in codegenOptions if name in options}
+    settings = dict(codegen, frontend=options.get("frontend", "antlr"))
+    engine = options.get("engine", "match")
+    print(f"{'workload':<12} {'scale':>7} {'run ms':>10} {'ms/scale':>10} {'ratio':>7}")
+    for name in names:
+        baseline = None
+        for scale in scales:
+            source, stdin = workloads[name](scale)
+            program = decodeProgram(compileWorkload(source, settings))
+            elapsed = measureRun(program, stdin, engine, repeat)["time"]
+            perScale = elapsed / scale
+            baseline = baseline or perScale
+            print(f"{name:<12} {scale:>7g} {elapsed * 1000:>10.1f} {perScale * 1000:>10.2f} {perScale / baseline:>7.2f}")
+
+
+def getMetric(result: dict, metric: str):
+    section, name = metric.split(".")
+    return result.get(section, dict()).get(name)
+
+
+def compareResults(oldPath: str, newPath: str, threshold: float):
+    with open(oldPath) as oldFile, open(newPath) as newFile:
+        old, new = json.load(oldFile), json.load(newFile)
+    for setting in ("python", "machine", "scale", "options"):
+        if old.get(setting) != new.get(setting):
+            print(f"Note: {setting} differs ({old.get(setting)} vs {new.get(setting)})")
+    regressions = 0
+    for name in new["workloads"]:
+        if name not in old["workloads"]:
+            continue
+        for metric, higherIsBetter in metrics:
+            before, after = getMetric(old["workloads"][name], metric), getMetric(new["workloads"][name], metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before * 100 if before else 0.0
+            worse = -change if higherIsBetter else change
+            noise = metric.split(".")[0] in ("compile", "load") and max(before, after) < timeFloor
+            flag = ""
+            if worse > threshold and not noise:
+                flag = "REGRESSION"
+                regressions += 1
+            elif -worse > threshold and not noise:
+                flag = "improved"
+            print(f"{name:<12} {metric:<26} {before:>14.6g} {after:>14.6g} {change:>+8.1f}% {flag}")
+    print(f"{regressions} regressions above {threshold:g}%")
+    return regressions
+
+
+def generateWorkloads(directory: str, names: list[str], scale: float):
+    os.makedirs(directory, exist_ok=True)
+    for name in names:
+        source, stdin = workloads[name](scale)
+        with open(os.path.join(directory, f"{name}.lang"), "w") as sourceFile:
+            sourceFile.write(source)
+        with open(os.path.join(directory, f"{name}.in"), "w") as inputFile:
+            inputFile.write(stdin)
+
+
+def main():
+    arguments, options = parseArguments(sys.argv[1:])
+    command = arguments[0] if arguments else "run"
+    if command == "compare":
+        if len(arguments) < 3:
+            print("Error: compare needs two result files")
+            return
+        if compareResults(arguments[1], arguments[2], float(options.get("threshold", 10))):
+            sys.exit(1)
+        return
+    names = arguments[1:] if command in ("run", "generate", "scaling") else arguments
+    names = names or (["append", "strings"] if command == "scaling" else list(workloads))
+    unknown = [name for name in names if name not in workloads]
+    if unknown:
+        print(f"Error: unknown workload '{unknown[0]}'")
+        return
+    if command == "generate":
+        generateWorkloads(options.get("out") or "workloads", names, float(options.get("scale", 1)))
+        return
+    if command == "scaling":
+        runScaling(names, options)
+        return
+    runBenchmarks(names, options)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+import math
+import os
+import random
+
+
+
+samplesDirectory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "samples")
+
+
+def readSample(name: str):
+    with open(os.path.join(samplesDirectory, name)) as sampleFile:
+        return sampleFile.read()
+
+
+class TypedProgramGenerator:
+    types = ["int", "float", "bool", "string"]
+    loopDepth = 3
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.variables = {typeStr: list() for typeStr in TypedProgramGenerator.types}
+
+    def literal(self, typeStr: str):
+        rng = self.rng
+        match typeStr:
+            case "int":
+                return str(rng.randint(0, 99))
+            case "float":
+                return f"{rng.randint(0, 99)}.{rng.randint(1, 99)}"
+            case "bool":
+                return rng.choice(["true", "false"])
+        return rng.choice(["\"\"", "\"a\"", "\"xyz\"", "\"hello world\""])
+
+    def leaf(self, typeStr: str):
+        if self.variables[typeStr] and self.rng.random() < 0.6:
+            return self.rng.choice(self.variables[typeStr])
+        return self.literal(typeStr)
+
+    def operand(self, typeStr: str, depth: int):
+        expression = self.expression(typeStr, depth)
+        return f"({expression})" if " " in expression else expression
+
+    def expression(self, typeStr: str, depth: int = 0):
+        rng = self.rng
+        if depth > 4 or rng.random() < 0.25:
+            return self.leaf(typeStr)
+        choice = rng.random()
+        match typeStr:
+            case "int":
+                if choice < 0.1:
+                    return f"-{self.operand('int', depth + 1)}"
+                if choice < 0.2:
+                    return f"({self.expression('int', depth + 1)})"
+                if choice < 0.3:
+                    return f"{self.operand('int', depth + 1)} {rng.choice(['*', '/', '%'])} {rng.randint(1, 9)}"
+                operator = rng.choice(["+", "-"])
+                return f"{self.operand('int', depth + 1)} {operator} {self.operand('int', depth + 1)}"
+            case "float":
+                if choice < 0.2:
+                    return f"({self.expression('float', depth + 1)})"
+                if choice < 0.3:
+                    return f"{self.operand('float', depth + 1)} / {rng.randint(1, 9)}.5"
+                left, right = rng.choice([("float", "float"), ("int", "float"), ("float", "int")])
+                operator = rng.choice(["+", "-", "*"])
+                return f"{self.operand(left, depth + 1)} {operator} {self.operand(right, depth + 1)}"
+            case "bool":
+                if choice < 0.15:
+                    return f"!{self.operand('bool', depth + 1)}"
+                if choice < 0.5:
+                    operandType = rng.choice(["int", "float"])
+                    operator = rng.choice(["<", ">", "==", "!="])
+                    return f"{self.operand(operandType, depth + 1)} {operator} {self.operand(operandType, depth + 1)}"
+                if choice < 0.6:
+                    return f"{self.operand('string', depth + 1)} == {self.operand('string', depth + 1)}"
+                operator = rng.choice(["&&", "||"])
+                return f"{self.operand('bool', depth + 1)} {operator} {self.operand('bool', depth + 1)}"
+        return f"{self.operand('string', depth + 2)} . {self.operand('string', depth + 2)}"
+
+    def assignment(self):
+        rng = self.rng
+        typeStr = rng.choice([typeStr for typeStr in TypedProgramGenerator.types if self.variables[typeStr]])
+        target = rng.choice(self.variables[typeStr])
+        if typeStr == "int":
+            return f"{target} = ({self.expression('int')}) % 1000;"
+        if typeStr == "string":
+            return f"{target} = {self.expression('string', 3)};"
+        return f"{target} = {self.expression(typeStr)};"
+
+    def statement(self, depth: int):
+        rng = self.rng
+        choice = rng.random()
+        if choice < 0.45:
+            return self.assignment()
+        if choice < 0.6:
+            count = rng.randint(1, 3)
+            return f"write {', '.join(self.expression(rng.choice(TypedProgramGenerator.types)) for _ in range(count))};"
+        if choice < 0.75 and depth < TypedProgramGenerator.loopDepth:
+            condition = self.expression("bool")
+            body = self.block(depth + 1)
+            if rng.random() < 0.5:
+                return f"if ({condition}) {body} else {self.block(depth + 1)}"
+            return f"if ({condition}) {body}"
+        if choice < 0.9 and depth < TypedProgramGenerator.loopDepth:
+            counter = f"k{depth}"
+            return f"for ({counter} = 0; {counter} < {rng.randint(2, 5)}; {counter} = {counter} + 1) {self.block(depth + 1)}"
+        return f"{self.expression(rng.choice(TypedProgramGenerator.types))};"
+
+    def block(self, depth: int):
+        statements = [self.statement(depth) for _ in range(self.rng.randint(1, 4))]
+        return "{\n" + "\n".join(statements) + "\n}"
+
+    def program(self, statementCount: int):
+        counters = ", ".join(f"k{depth}" for depth in range(TypedProgramGenerator.loopDepth))
+        lines = [f"int {counters};"]
+        for idx, typeStr in enumerate(TypedProgramGenerator.types * 3):
+            name = f"{typeStr[0]}{idx}"
+            lines.append(f"{typeStr} {name};")
+            lines.append(f"{name} = {self.literal(typeStr)};")
+            self.variables[typeStr].append(name)
+        lines.extend(self.statement(0) for _ in range(statementCount))
+        return "\n".join(lines) + "\n"
+
+
+def primesWorkload(scale: float):
+    return readSample("primes.lang"), f"{int(300 * math.sqrt(scale))}\n"
+
+
+def centroidsWorkload(scale: float):
+    rng = random.Random(1)
+    points = int(2000 * scale)
+    lines = list()
+    for idx in range(points):
+        lines.extend(f"{rng.uniform(-100, 100):.3f}" for _ in range(3))
+        lines.append(rng.choice(["yes", "Yes", "YES", "y"]) if idx < points - 1 else "no")
+    return readSample("centroids.lang"), "\n".join(lines) + "\n"
+
+
+def stringsWorkload(scale: float):
+    source = f"""string s, line;
+int i, j;
+for (i = 0; i < {int(4000 * scale)}; i = i + 1) {{
+    line = "";
+    for (j = 0; j < 10; j = j + 1) {{
+        line = line . "ab";
+    }}
+    s = s . line . ",";
+    if (i % 1000 == 999) {{
+        write i, ": ", line;
+    }}
+}}
+write s;
+"""
+    return source, ""
+
+
+def appendWorkload(scale: float):
+    source = f"""string s;
+int i;
+for (i = 0; i < {int(20000 * scale)}; i = i + 1) {{
+    s = s . "prime";
+}}
+write s;
+"""
+    return source, ""
+
+
+def _chain(rng: random.Random, variables: list[str], length: int, depth: int):
+    terms = list()
+    for _ in range(length):
+        if depth > 0 and rng.random() < 0.3:
+            terms.append(f"({_chain(rng, variables, rng.randint(2, 5), depth - 1)})")
+        elif rng.random() < 0.5:
+            terms.append(rng.choice(variables))
+        else:
+            terms.append(str(rng.randint(1, 9)))
+    expression = terms[0]
+    for term in terms[1:]:
+        expression += f" {rng.choice(['+', '-', '+', '-', '*'])} {term}"
+    return expression
+
+
+def expressionsWorkload(scale: float):
+    rng = random.Random(2)
+    names = ["a", "b", "c", "d"]
+    lines = ["int a, b, c, d, i;", "float x;", "a = 1; b = 2; c = 3; d = 4; x = 0.5;"]
+    lines.append("for (i = 0; i < 100; i = i + 1) {")
+    for idx in range(int(20 * scale)):
+        target = names[idx % len(names)]
+        lines.append(f"    {target} = ({_chain(rng, names + ['i'], 40, 4)}) % 1000;")
+        lines.append(f"    x = x / 2 + {_chain(rng, names + ['x'], 10, 2)};")
+    lines.append("}")
+    lines.append("write a, \" \", b, \" \", c, \" \", d, \" \", x;")
+    return "\n".join(lines) + "\n", ""
+
+
+def generatedWorkload(scale: float):
+    return TypedProgramGenerator(random.Random(3)).program(int(300 * scale)), ""
+
+
+workloads = {
+    "primes": primesWorkload,
+    "centroids": centroidsWorkload,
+    "strings": stringsWorkload,
+    "append": appendWorkload,
+    "expressions": expressionsWorkload,
+    "generated": generatedWorkload
+}
@@ -0,0 +1,365 @@
+import mmap
+import struct
+import sys
+from array import array
+from cli import parseArguments
+
+
+
+MAGIC = b"PLACBIN\0"
+VERSION = 2
+LINE_TABLE = 1
+headerFormat = struct.Struct("<8sHHIIII")
+constantFormat = struct.Struct("<BI")
+lengthFormat = struct.Struct("<I")
+valueTypes = ["int", "float", "bool", "string"]
+
+
+class Opcode:
+    PUSH, POP, LOAD, SAVE, JMP, FJMP, PRINT, READ = range(8)
+    UMINUS, NOT, ITOF = range(8, 11)
+    ADD, SUB, MUL, DIV, MOD, CONCAT, AND, OR, GT, LT, EQ = range(11, 22)
+    STORE, NE = range(22, 24)
+    CJMP, INC, OPC, OPV = range(24, 28)
+    RANGE, NEXT = range(28, 30)
+    ANDJMP, ORJMP = range(30, 32)
+    codes = {
+        "push": PUSH, "pop": POP, "load": LOAD, "save": SAVE,
+        "jmp": JMP, "fjmp": FJMP, "print": PRINT, "read": READ,
+        "uminus": UMINUS, "not": NOT, "itof": ITOF,
+        "add": ADD, "sub": SUB, "mul": MUL, "div": DIV, "mod": MOD,
+        "concat": CONCAT, "and": AND, "or": OR, "gt": GT, "lt": LT, "eq": EQ,
+        "store": STORE, "ne": NE,
+        "cjmp": CJMP, "inc": INC, "opc": OPC, "opv": OPV,
+        "range": RANGE, "next": NEXT, "andjmp": ANDJMP, "orjmp": ORJMP
+    }
+    names = {code: name for name, code in codes.items()}
+
+
+class Program:
+    def __init__(self, opcodes, operands, secondOperands, constants: list, variableNames: list, labels: dict, lines = None):
+        self.opcodes = opcodes
+        self.operands = operands
+        self.secondOperands = secondOperands
+        self.constants = constants
+        self.variableNames = variableNames
+        self.labels = labels
+        self.lines = lines
+
+
+def getValueOfType(typeStr: str, value, rmQuotes = False):
+    match typeStr:
+        case "int":
+            return int(value)
+        case "float":
+            return float(value)
+        case "bool":
+            if value == "true":
+                return True
+            elif value == "false":
+                return False
+            raise ValueError()
+        case "string":
+            if rmQuotes:
+                return value[1:-1]
+            return value
+    raise ValueError()
+
+
+def getTypeOfValue(value):
+    return {int: "int", float: "float", bool: "bool", str: "string"}[type(value)]
+
+
+def formatValue(value):
+    match getTypeOfValue(value):
+        case "bool":
+            return "true" if value else "false"
+        case "float":
+            return repr(value)
+        case "string":
+            return value
+    return str(value)
+
+
+def decodeProgram(lines: list[str]):
+    instructions, labels = list(), dict()
+    sourceLines, sourceLine = list(), 0
+    for line in lines:
+        parameters = line.strip().split(" ", maxsplit=2)
+        if parameters[0] == "label":
+            labels[int(parameters[1])] = len(instructions)
+        elif parameters[0] == "line":
+            sourceLine = int(parameters[1])
+        else:
+            instructions.append(parameters)
+            sourceLines.append(sourceLine)
+    opcodes, operands, secondOperands = list(), list(), list()
+    constants, constantIds, variableNames = list(), dict(), list()
+
+    def addConstant(typeStr: str, literal: str):
+        key = (typeStr, literal)
+        if key not in constantIds:
+            constantIds[key] = len(constants)
+            constants.append(getValueOfType(typeStr, literal, True))
+        return constantIds[key]
+
+    def addVariable(slot: str, name: str):
+        slot = int(slot)
+        if slot >= len(variableNames):
+            variableNames.extend([None] * (slot + 1 - len(variableNames)))
+        variableNames[slot] = name
+        return slot
+
+    for parameters in instructions:
+        opcode = Opcode.codes[parameters[0]]
+        operand, secondOperand = 0, 0
+        match opcode:
+            case Opcode.PUSH:
+                operand = addConstant(parameters[1], parameters[2])
+            case Opcode.LOAD | Opcode.SAVE | Opcode.STORE:
+                operand = addVariable(parameters[1], parameters[2])
+            case Opcode.READ:
+                operand = valueTypes.index(parameters[1])
+            case Opcode.JMP | Opcode.FJMP | Opcode.ANDJMP | Opcode.ORJMP:
+                operand = labels[int(parameters[1])]
+            case Opcode.PRINT:
+                operand = int(parameters[1])
+            case Opcode.CJMP:
+                operand, secondOperand = labels[int(parameters[2])], Opcode.codes[parameters[1]]
+            case Opcode.INC:
+                name, step = parameters[2].split(" ")
+                operand, secondOperand = addVariable(parameters[1], name), addConstant("int", step)
+            case Opcode.OPC:
+                typeStr, literal = parameters[2].split(" ", maxsplit=1)
+                operand, secondOperand = addConstant(typeStr, literal), Opcode.codes[parameters[1]]
+            case Opcode.OPV:
+                slot, name = parameters[2].split(" ")
+                operand, secondOperand = addVariable(slot, name), Opcode.codes[parameters[1]]
+            case Opcode.RANGE | Opcode.NEXT:
+                name, label = parameters[2].split(" ")
+                operand, secondOperand = labels[int(label)], addVariable(parameters[1], name)
+        opcodes.append(opcode)
+        operands.append(operand)
+        secondOperands.append(secondOperand)
+    if not any(sourceLines):
+        sourceLines = None
+    return Program(opcodes, operands, secondOperands, constants, variableNames, labels, sourceLines)
+
+
+def _formatConstant(value):
+    literal = formatValue(value)
+    if type(value) == str:
+        literal = f"\"{literal}\""
+    return f"{getTypeOfValue(value)} {literal}"
+
+
+def formatProgram(program: Program):
+    labelIds = dict()
+    for labelId, idx in sorted(program.labels.items()):
+        labelIds.setdefault(idx, list()).append(labelId)
+    lines, sourceLine = list(), 0
+    for idx in range(len(program.opcodes) + 1):
+        for labelId in labelIds.get(idx, []):
+            lines.append(f"label {labelId}")
+        if idx == len(program.opcodes):
+            break
+        if program.lines is not None and program.lines[idx] != sourceLine:
+            sourceLine = program.lines[idx]
+            lines.append(f"line {sourceLine}")
+        opcode, operand = program.opcodes[idx], program.operands[idx]
+        secondOperand = program.secondOperands[idx]
+        name = Opcode.names[opcode]
+        match opcode:
+            case Opcode.PUSH:
+                lines.append(f"{name} {_formatConstant(program.constants[operand])}")
+            case Opcode.LOAD | Opcode.SAVE | Opcode.STORE:
+                lines.append(f"{name} {operand} {program.variableNames[operand]}")
+            case Opcode.CJMP:
+                lines.append(f"{name} {Opcode.names[secondOperand]} {labelIds[operand][0]}")
+            case Opcode.INC:
+                step = program.constants[secondOperand]
+                lines.append(f"{name} {operand} {program.variableNames[operand]} {step}")
+            case Opcode.OPC:
+                constant = _formatConstant(program.constants[operand])
+                lines.append(f"{name} {Opcode.names[secondOperand]} {constant}")
+            case Opcode.OPV:
+                variable = f"{operand} {program.variableNames[operand]}"
+                lines.append(f"{name} {Opcode.names[secondOperand]} {variable}")
+            case Opcode.RANGE | Opcode.NEXT:
+                variable = f"{secondOperand} {program.variableNames[secondOperand]}"
+                lines.append(f"{name} {variable} {labelIds[operand][0]}")
+            case Opcode.READ:
+                lines.append(f"{name} {valueTypes[operand]}")
+            case Opcode.JMP | Opcode.FJMP | Opcode.ANDJMP | Opcode.ORJMP:
+                lines.append(f"{name} {labelIds[operand][0]}")
+            case Opcode.PRINT:
+                lines.append(f"{name} {operand}")
+            case _:
+                lines.append(name)
+    return lines
+
+
+def _align(data: bytearray):
+    data.extend(bytes(-len(data) % 4))
+
+
+def _encodeOperands(values):
+    operands = array("i", values)
+    if sys.byteorder != "little":
+        operands.byteswap()
+    return operands.tobytes()
+
+
+def _decodeOperands(view: memoryview):
+    if sys.byteorder == "little":
+        return view.cast("i")
+    operands = array("i", view)
+    operands.byteswap()
+    return operands
+
+
+def encodeBinary(program: Program):
+    count = len(program.opcodes)
+    flags = LINE_TABLE if program.lines is not None else 0
+    data = bytearray(headerFormat.pack(
+        MAGIC, VERSION, flags, count, len(program.labels),
+        len(program.constants), len(program.variableNames)
+    ))
+    data.extend(bytes(program.opcodes))
+    _align(data)
+    data.extend(_encodeOperands(program.operands))
+    data.extend(_encodeOperands(program.secondOperands))
+    for labelId, idx in sorted(program.labels.items()):
+        data.extend(struct.pack("<ii", labelId, idx))
+    for value in program.constants:
+        encoded = formatValue(value).encode()
+        data.extend(constantFormat.pack(valueTypes.index(getTypeOfValue(value)), len(encoded)))
+        data.extend(encoded)
+    for name in program.variableNames:
+        encoded = (name or "").encode()
+        data.extend(lengthFormat.pack(len(encoded)))
+        data.extend(encoded)
+    if program.lines is not None:
+        _align(data)
+        data.extend(_encodeOperands(program.lines))
+    return bytes(data)
+
+
+def decodeBinary(buffer):
+    view = memoryview(buffer)
+    magic, version, flags, count, labelCount, constantCount, variableCount = headerFormat.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("not a binary program")
+    if version not in (1, VERSION):
+        raise ValueError(f"unsupported bytecode version {version}")
+    offset = headerFormat.size
+    operandTables = 2 if version > 1 else 1
+    if offset + count + (-count % 4) + 4 * count * operandTables + 8 * labelCount > len(view):
+        raise ValueError("truncated instructions")
+    opcodes = view[offset:offset + count]
+    offset += count + (-count % 4)
+    operands = _decodeOperands(view[offset:offset + 4 * count])
+    offset += 4 * count
+    secondOperands = [0] * count
+    if version > 1:
+        secondOperands = _decodeOperands(view[offset:offset + 4 * count])
+        offset += 4 * count
+    labels = dict()
+    for _ in range(labelCount):
+        labelId, idx = struct.unpack_from("<ii", view, offset)
+        labels[labelId] = idx
+        offset += 8
+    constants = list()
+    for _ in range(constantCount):
+        typeIdx, length = constantFormat.unpack_from(view, offset)
+        offset += constantFormat.size
+        if offset + length > len(view):
+            raise ValueError("truncated constants")
+        text = bytes(view[offset:offset + length]).decode()
+        constants.append(getValueOfType(valueTypes[typeIdx], text))
+        offset += length
+    variableNames = list()
+    for _ in range(variableCount):
+        length, = lengthFormat.unpack_from(view, offset)
+        offset += lengthFormat.size
+        if offset + length > len(view):
+            raise ValueError("truncated variable names")
+        variableNames.append(bytes(view[offset:offset + length]).decode())
+        offset += length
+    lines = None
+    if flags & LINE_TABLE:
+        offset += -offset % 4
+        if offset + 4 * count > len(view):
+            raise ValueError("truncated line table")
+        lines = _decodeOperands(view[offset:offset + 4 * count])
+    return Program(opcodes, operands, secondOperands, constants, variableNames, labels, lines)
+
+
+def isBinary(path: str):
+    with open(path, "rb") as inputFile:
+        return inputFile.read(len(MAGIC)) == MAGIC
+
+
+def readBinary(path: str):
+    with open(path, "rb") as inputFile:
+        buffer = mmap.mmap(inputFile.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return decodeBinary(buffer)
+    except struct.error:
+        raise ValueError("truncated binary program")
+
+
+def readText(path: str):
+    with open(path) as inputFile:
+        return decodeProgram(inputFile.readlines())
+
+
+def readProgram(path: str):
+    if isBinary(path):
+        return readBinary(path)
+    return readText(path)
+
+
+def writeProgram(path: str, program: Program, binary: bool):
+    if binary:
+        with open(path, "wb") as outputFile:
+            outputFile.write(encodeBinary(program))
+    else:
+        with open(path, "w") as outputFile:
+            for line in formatProgram(program):
+                outputFile.write(f"{line}\n")
+
+
+def writeInstructions(path: str, instructions: list[str], binary: bool):
+    if binary:
+        writeProgram(path, decodeProgram(instructions), True)
+        return
+    with open(path, "w") as outputFile:
+        for instruction in instructions:
+            outputFile.write(f"{instruction}\n")
+
+
+def main():
+    arguments, options = parseArguments(sys.argv[1:])
+    if len(arguments) < 2:
+        print("Error: wrong converter arguments")
+        return
+    try:
+        binary = not isBinary(arguments[0])
+        program = readProgram(arguments[0])
+    except OSError:
+        print(f"File '{arguments[0]}' does not exist")
+        return
+    except (KeyError, IndexError, ValueError):
+        print(f"File '{arguments[0]}' is not a valid program")
+        return
+    if "to" in options:
+        binary = options["to"] == "binary"
+    try:
+        writeProgram(arguments[1], program, binary)
+    except OSError:
+        print(f"Can't open file '{arguments[1]}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+
+compilerSources = [
+    "compiler.py", "optimizer.py", "bytecode.py", "frontend.py", "antlrfrontend.py", "cache.py",
+    "antlr/GrammarLexer.py", "antlr/GrammarParser.py"
+]
+
+
+def compilerVersion():
+    digest = hashlib.sha256()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name in compilerSources:
+        with open(os.path.join(root, name), "rb") as sourceFile:
+            digest.update(sourceFile.read())
+    return digest.hexdigest()
+
+
+def defaultCacheDirectory():
+    cacheHome = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cacheHome, "plac")
+
+
+class CompileCache:
+    entrySuffix = ".entry"
+
+    def __init__(self, directory: str = None, maxSize: int = 64 << 20):
+        self.directory = directory or defaultCacheDirectory()
+        self.maxSize = maxSize
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, source: str, options: dict):
+        digest = hashlib.sha256()
+        digest.update(compilerVersion().encode())
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str):
+        return os.path.join(self.directory, key + CompileCache.entrySuffix)
+
+    def _writeAtomic(self, path: str, data: str):
+        descriptor, temporaryPath = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(descriptor, "w") as temporaryFile:
+                temporaryFile.write(data)
+            os.replace(temporaryPath, path)
+        except BaseException:
+            os.unlink(temporaryPath)
+            raise
+
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.directory, ".lock"), "w") as lockFile:
+            if fcntl is not None:
+                fcntl.flock(lockFile, fcntl.LOCK_EX)
+            yield
+
+    def _count(self, counter: str):
+        with self._locked():
+            stats = self._readStats()
+            stats[counter] += 1
+            self._writeAtomic(os.path.join(self.directory, "stats.json"), json.dumps(stats))
+
+    def _readStats(self):
+        try:
+            with open(os.path.join(self.directory, "stats.json")) as statsFile:
+                return json.load(statsFile)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0}
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path) as entryFile:
+                entry = json.load(entryFile)
+            os.utime(path)
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry["messages"], entry["instructions"], entry["diagnostics"]
+
+    def put(self, key: str, entry: tuple):
+        messages, instructions, diagnostics = entry
+        self._writeAtomic(self._path(key), json.dumps({
+            "messages": messages, "instructions": instructions, "diagnostics": diagnostics
+        }))
+        self._evict()
+
+    def _entries(self):
+        entries = list()
+        for name in os.listdir(self.directory):
+            if not name.endswith(CompileCache.entrySuffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        totalSize = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if totalSize <= self.maxSize:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            totalSize -= size
+
+    def stats(self):
+        entries = self._entries()
+        stats = self._readStats()
+        stats["entries"] = len(entries)
+        stats["size"] = sum(size for _, size, _ in entries)
+        return stats
+
+    def formatStats(self):
+        stats = self.stats()
+        return (
+            f"Compile cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['entries']} entries, {stats['size']} bytes"
+        )
@@ -0,0 +1,9 @@
+def parseArguments(arguments: list[str]):
+    positional, options = list(), dict()
+    for argument in arguments:
+        if argument.startswith("-"):
+            name, _, value = argument.lstrip("-").partition("=")
+            options[name] = value
+        else:
+            positional.append(argument)
+    return positional, options
@@ -0,0 +1,35 @@
+import sys
+from bytecode import writeInstructions
+from cli import parseArguments
+from daemon import defaultSocketPath, requestCompile
+
+
+
+def main():
+    arguments, options = parseArguments(sys.argv[1:])
+    if len(arguments) < 2 or "batch" in options:
+        import compiler
+        return compiler.main()
+    try:
+        with open(arguments[0]) as inputFile:
+            source = inputFile.read()
+    except OSError:
+        print(f"File '{arguments[0]}' does not exist")
+        return
+    response = requestCompile(options.get("socket") or defaultSocketPath(), source, options)
+    if response is None:
+        import compiler
+        return compiler.main()
+    sys.stderr.write(response["stderr"])
+    for message in response["messages"]:
+        print(message)
+    if response["instructions"] is None:
+        return
+    try:
+        writeInstructions(arguments[1], response["instructions"], options.get("format", "text") == "binary")
+    except OSError:
+        print(f"Can't open file '{arguments[1]}'")
+
+
+if __name__ == '__main__':
+    main()
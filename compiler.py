@@ -1,50 +1,78 @@
+import io
+import os
 import sys
-from antlr4 import InputStream, CommonTokenStream
-from antlr4.error.ErrorListener import ErrorListener
-from antlr.GrammarLexer import GrammarLexer
-from antlr.GrammarParser import GrammarParser
-from antlr.GrammarVisitor import GrammarVisitor
+import time
+from contextlib import redirect_stderr
+from functools import partial
+from bytecode import decodeProgram, formatValue, getValueOfType, writeInstructions
+from cli import parseArguments
+from frontend import parseSource
+from optimizer import compactLines, convertCountedLoops, eliminateDeadCode, fuse, hoistInvariants, peephole
 
 
 
-class SyntaxErrorListener(ErrorListener):
-    
-    def __init__(self):
-        super(SyntaxErrorListener, self).__init__()
-        self.errors = []
-
-
-    def syntaxError(self, _, __, line, ___, msg, ____):
-        self.errors.append(f"Syntax error at line {line} {msg}")
-
-
-
-class CompilerVisitor(GrammarVisitor):
+class CompilerVisitor:
     defaultValues = {"int": "0", "float": "0.0", "bool": "false", "string": "\"\""}
     operatorInstructions = {
         '+': ["add"], '-': ["sub"], '*': ["mul"], '/': ["div"], 
         "%": ["mod"], ".": ["concat"], '<': ["lt"], '>': ["gt"], 
         '==': ["eq"], '!=': ["eq", "not"], '&&': ["and"], '||': ["or"]
     }
+    foldOperations = {
+        '+': lambda a, b: a + b, '-': lambda a, b: a - b, '*': lambda a, b: a * b,
+        '/': lambda a, b: a // b if type(a) == int else a / b, '%': lambda a, b: a % b,
+        '.': lambda a, b: a + b, '<': lambda a, b: a < b, '>': lambda a, b: a > b,
+        '==': lambda a, b: a == b, '!=': lambda a, b: a != b,
+        '&&': lambda a, b: a and b, '||': lambda a, b: a or b
+    }
+    shortCircuitInstructions = {'&&': "andjmp", '||': "orjmp"}
     
 
     class ExprType:
-        def __init__(self, exprType: str, conversions = []):
+        def __init__(self, exprType: str, conversions = None, value = None, floatValue = None):
             self.type = exprType
-            self.conversions = conversions
+            self.conversions = conversions if conversions is not None else []
+            self.value = value
+            self.floatValue = floatValue
 
 
-    def __init__(self):
+    def __init__(self, optimize: bool = False, lineTable: bool = False, shortCircuit: bool = False):
         self.error = False
+        self.errors = list()
+        self.optimize = optimize
         self.symbolTable = dict()
+        self.slotTable = dict()
         self.instructionList = list()
         self.labelId = 0
         self.conversions = set()
+        self.nesting = 0
+        self.assignmentCounts = dict()
+        self.conditionalAssignments = set()
+        self.constants = dict()
+        self.lastAssignment = None
+        self.lineTable = lineTable
+        self.currentLine = None
+        self.shortCircuit = shortCircuit
+
+
+    def visit(self, tree):
+        return tree.accept(self)
+
+
+    def visitChildren(self, node):
+        result = None
+        for idx in range(node.getChildCount()):
+            result = node.getChild(idx).accept(self)
+        return result
+
+
+    def visitTerminal(self, node):
+        return None
 
 
     def _setError(self, errorString: str):
         self.error = True
-        print(errorString)
+        self.errors.append(errorString)
         return CompilerVisitor.ExprType("error")
 
 
@@ -53,15 +81,48 @@ class CompilerVisitor(GrammarVisitor):
             self.instructionList.append(instruction)
 
     
+    def _markLine(self, line: int):
+        if self.lineTable and line != self.currentLine:
+            self._addInstruction(f"line {line}")
+            self.currentLine = line
+
+
+    def _getLine(self, tree):
+        while tree.getChildCount() > 0:
+            tree = tree.getChild(0)
+        return tree.symbol.line
+
+
     def _getConversionIndex(self):
         return len(self.instructionList)
 
 
+    def _pushConstant(self, exprType: str, value, floatValue = None):
+        literal = formatValue(value)
+        if exprType == "string":
+            literal = f"\"{literal}\""
+        self._addInstruction(f"push {exprType} {literal}")
+        return CompilerVisitor.ExprType(exprType, [self._getConversionIndex()], value, floatValue)
+
+
+    def _foldConstant(self, count: int, exprType: str, value, floatValue = None):
+        if not self.error:
+            del self.instructionList[-count:]
+        return self._pushConstant(exprType, value, floatValue)
+
+
     def _convertFloat(self, exprTypes: list[ExprType]):
         exprTypeStrs = [exprTypes[0].type, exprTypes[1].type]
         if 'int' in exprTypeStrs and 'float' in exprTypeStrs:
-            if exprTypeStrs[0] == 'int':
+            if exprTypeStrs[0] == 'int' and exprTypes[0].value is not None:
+                if not self.error:
+                    pushIdx = exprTypes[0].conversions[0] - 1
+                    self.instructionList[pushIdx] = f"push float {formatValue(exprTypes[0].floatValue)}"
+            elif exprTypeStrs[0] == 'int':
                 self.conversions.update(exprTypes[0].conversions)
+            elif exprTypes[1].value is not None:
+                if not self.error:
+                    self.instructionList[-1] = f"push float {formatValue(float(exprTypes[1].value))}"
             else:
                  self._addInstruction("itof")
             exprTypes[0].type = "float"
@@ -85,59 +146,129 @@ class CompilerVisitor(GrammarVisitor):
         return self._setError(f"Error at line {errorLine} unary '{op}' is not supported for {exprType.type}")
 
 
+    def _foldBinaryExpression(self, exprTypes: tuple[ExprType], allowed: list[str], bop):
+        left, right = exprTypes
+        if left.value is None or right.value is None:
+            return None
+        leftValue, rightValue, operandType = left.value, right.value, left.type
+        if left.type == "int" and right.type == "float":
+            leftValue, operandType = left.floatValue, "float"
+        elif left.type == "float" and right.type == "int":
+            rightValue = float(right.value)
+        elif left.type != right.type:
+            return None
+        if operandType not in allowed:
+            return None
+        operation = CompilerVisitor.foldOperations[bop.text]
+        try:
+            value = operation(leftValue, rightValue)
+            floatValue = operation(left.floatValue, right.floatValue) if operandType == "int" else None
+        except ArithmeticError:
+            return None
+        resultType = "bool" if bop.text in ['<', '>', '==', '!='] else operandType
+        return self._foldConstant(2, resultType, value, floatValue)
+
+
     def _checkBinaryExpression(self, exprTypes: tuple[ExprType], allowed: list[str], bop, bopType = False):
+        folded = self._foldBinaryExpression(exprTypes, allowed, bop)
+        if folded is not None:
+            return folded
         self._convertFloat(exprTypes)
         if exprTypes[0].type in allowed and exprTypes[0].type == exprTypes[1].type:
             self._appendBop(bop, exprTypes[0].type if bopType else None)
-            exprTypes[0].conversions += exprTypes[1].conversions
+            if exprTypes[0].type == "int":
+                exprTypes[0].conversions += exprTypes[1].conversions
+            else:
+                exprTypes[0].conversions = []
+            exprTypes[0].value = exprTypes[0].floatValue = None
             return exprTypes[0]
         errorLine, op = bop.line, bop.text
         errorTypes = f"{exprTypes[0].type} and {exprTypes[1].type}"
         return self._setError(f"Error at line {errorLine} '{op}' is not supported for {errorTypes}")
     
 
+    def _visitShortCircuit(self, expression):
+        endLabel = self.labelId
+        self.labelId += 1
+        left = self.visit(expression.expression()[0])
+        self._addInstruction(f"{CompilerVisitor.shortCircuitInstructions[expression.bop.text]} {endLabel}")
+        right = self.visit(expression.expression()[1])
+        self._addInstruction(f"label {endLabel}")
+        self.lastAssignment = None
+        if left.type == "error" or right.type == "error":
+            return left
+        if left.type != "bool" or right.type != "bool":
+            errorLine, op = expression.bop.line, expression.bop.text
+            return self._setError(f"Error at line {errorLine} '{op}' is not supported for {left.type} and {right.type}")
+        return CompilerVisitor.ExprType("bool")
+
+
     def _checkBoolExpression(self, exprType: ExprType, stmt: str, token):
         if "bool" != exprType.type and exprType.type != "error":
             errorLine = token.symbol.line
             self._setError(f"Error at line {errorLine} conditional expression in {stmt} must be of type bool")
 
 
+    def _countAssignments(self, tree, conditional: bool = False):
+        identifiers, bop = list(), getattr(tree, "bop", None)
+        if bop and bop.text == '=':
+            primary = tree.expression()[0].primary()
+            if primary and primary.ID():
+                identifiers.append(primary.ID())
+        elif hasattr(tree, "READ") and tree.READ():
+            identifiers.extend(tree.ID())
+        for id in identifiers:
+            identifier = id.getText()
+            self.assignmentCounts[identifier] = self.assignmentCounts.get(identifier, 0) + 1
+            if conditional:
+                self.conditionalAssignments.add(identifier)
+        if self.shortCircuit and bop and bop.text in CompilerVisitor.shortCircuitInstructions:
+            conditional = True
+        for idx in range(tree.getChildCount()):
+            self._countAssignments(tree.getChild(idx), conditional)
+
+
     def _getForIds(self, count: int, third):
         if count == 3:
             return 0, 1, 2
         if count == 1:
             return None, 0, None
-        if isinstance(third, GrammarParser.ExpressionContext):
+        if third.getChildCount() > 0:
             return 0, 1, None
         return None, 0, 1
 
 
-    def visitPrimary(self, primary: GrammarParser.PrimaryContext):
+    def visitPrimary(self, primary):
         if primary.expression():
             exprType = self.visit(primary.expression())
             exprType.conversions = [self._getConversionIndex()]
+            if exprType.type == "int" and exprType.value is not None:
+                exprType.floatValue = float(exprType.value)
             return exprType
-        if primary.INT_LIT():
-            self._addInstruction(f"push int {primary.INT_LIT().getText()}")
-            return CompilerVisitor.ExprType("int", [self._getConversionIndex()])
-        if primary.FLOAT_LIT():
-            self._addInstruction(f"push float {primary.FLOAT_LIT().getText()}")
-            return CompilerVisitor.ExprType("float", [self._getConversionIndex()])
-        if primary.BOOL_LIT():
-            self._addInstruction(f"push bool {primary.BOOL_LIT().getText()}")
-            return CompilerVisitor.ExprType("bool", [self._getConversionIndex()])
-        if primary.STRING_LIT():
-            self._addInstruction(f"push string {primary.STRING_LIT().getText()}")
-            return CompilerVisitor.ExprType("string", [self._getConversionIndex()])
+        for literal, literalType in [
+            (primary.INT_LIT(), "int"), (primary.FLOAT_LIT(), "float"),
+            (primary.BOOL_LIT(), "bool"), (primary.STRING_LIT(), "string")
+        ]:
+            if literal:
+                self._addInstruction(f"push {literalType} {literal.getText()}")
+                exprType = CompilerVisitor.ExprType(literalType, [self._getConversionIndex()])
+                if self.optimize:
+                    exprType.value = getValueOfType(literalType, literal.getText(), True)
+                    exprType.floatValue = float(exprType.value) if literalType == "int" else None
+                return exprType
         identifier = primary.ID().getText()
+        if identifier in self.constants:
+            value = self.constants[identifier]
+            floatValue = float(value) if self.symbolTable[identifier] == "int" else None
+            return self._pushConstant(self.symbolTable[identifier], value, floatValue)
         if identifier in self.symbolTable:
-            self._addInstruction(f"load {identifier}")
+            self._addInstruction(f"load {self.slotTable[identifier]} {identifier}")
             return CompilerVisitor.ExprType(self.symbolTable[identifier], [self._getConversionIndex()])
         errorLine = primary.ID().symbol.line
         return self._setError(f"Error at line {errorLine} variable '{identifier}' not defined")
 
 
-    def visitExpression(self, expression: GrammarParser.ExpressionContext):
+    def visitExpression(self, expression):
         if expression.primary():
             return self.visit(expression.primary())
         if expression.uop:
@@ -146,12 +277,19 @@ class CompilerVisitor(GrammarVisitor):
                 return exprType
             if expression.uop.text == '-':
                 exprType = self._checkUnaryExpression(exprType, ["int", "float"], expression.uop)
+                if exprType.value is not None:
+                    floatValue = -exprType.floatValue if exprType.type == "int" else None
+                    return self._foldConstant(1, exprType.type, -exprType.value, floatValue)
                 self._addInstruction("uminus")
                 return exprType
             if expression.uop.text == '!':
                 exprType = self._checkUnaryExpression(exprType, ["bool"], expression.uop)        
+                if exprType.value is not None:
+                    return self._foldConstant(1, "bool", not exprType.value)
                 self._addInstruction("not")
                 return exprType
+        if self.shortCircuit and expression.bop.text in CompilerVisitor.shortCircuitInstructions:
+            return self._visitShortCircuit(expression)
         exprTypes: list[CompilerVisitor.ExprType] = (
             self.visit(expression.expression()[0]), 
             self.visit(expression.expression()[1])
@@ -166,29 +304,38 @@ class CompilerVisitor(GrammarVisitor):
             return self._checkBinaryExpression(exprTypes, ["string"], expression.bop)
         if expression.bop.text in ['<', '>']:
             exprType = self._checkBinaryExpression(exprTypes, ["int", "float"], expression.bop)
-            return CompilerVisitor.ExprType("error" if exprType == "error" else "bool")
+            return CompilerVisitor.ExprType("error" if exprType == "error" else "bool", value=exprType.value)
         if expression.bop.text in ['==', '!=']:
             exprType = self._checkBinaryExpression(exprTypes, ["int", "float", "string"], expression.bop)
-            return CompilerVisitor.ExprType("error" if exprType == "error" else "bool")
+            return CompilerVisitor.ExprType("error" if exprType == "error" else "bool", value=exprType.value)
         if expression.bop.text in ['&&', '||']:
             return self._checkBinaryExpression(exprTypes, ["bool"], expression.bop)
         primary = expression.expression()[0].primary()
         if not primary or not primary.ID():
             errorLine = expression.bop.line
             return self._setError(f"Error at line {errorLine} expression must be an lvalue")
-        variableType = exprTypes[0].type
+        variableType, valueType = exprTypes[0].type, exprTypes[1].type
         if self._convertFloat(exprTypes)[0].type != variableType:
             errorLine = expression.bop.line
             return self._setError(f"Error at line {errorLine} can't store {exprTypes[1].type} into {variableType} variable")
         variableName = primary.ID().getText()
-        self._addInstruction(f"save {variableName}")
+        variable = f"{self.slotTable[variableName]} {variableName}"
+        value = exprTypes[1].value
+        if valueType != variableType and (variableType, valueType) != ("float", "int"):
+            value = None
+        elif value is not None and variableType == "float":
+            value = float(value)
+        self.lastAssignment = (variableName, value)
+        self._addInstruction(f"save {variable}")
         self._addInstruction("pop")
-        self._addInstruction(f"load {variableName}")
+        self._addInstruction(f"load {variable}")
         exprTypes[0].conversions = []
         return exprTypes[0]
 
 
-    def visitStatement(self, statement: GrammarParser.StatementContext):
+    def visitStatement(self, statement):
+        self.nesting += 1
+        self._markLine(self._getLine(statement))
         if statement.type_():
             symbolType = "string"
             if statement.type_().INT():
@@ -202,8 +349,11 @@ class CompilerVisitor(GrammarVisitor):
                 identifier = id.getText()
                 if identifier not in self.symbolTable:
                     self.symbolTable[identifier] = symbolType
+                    self.slotTable[identifier] = len(self.slotTable)
                     self._addInstruction(f"push {symbolType} {value}")
-                    self._addInstruction(f"save {identifier}")
+                    self._addInstruction(f"save {self.slotTable[identifier]} {identifier}")
+                    if self.optimize and self.nesting == 1 and identifier not in self.assignmentCounts:
+                        self.constants[identifier] = getValueOfType(symbolType, value, True)
                 else:
                     errorLine = id.symbol.line
                     self._setError(f"Error at line {errorLine} variable '{identifier}' already defined")
@@ -211,12 +361,12 @@ class CompilerVisitor(GrammarVisitor):
             for id in statement.ID():
                 identifier = id.getText()
                 if identifier not in self.symbolTable:
-                    errorLine = statement.ID().symbol.line
+                    errorLine = id.symbol.line
                     self._setError(f"Error at line {errorLine} variable '{identifier}' not defined")
                 else:
                     symbolType = self.symbolTable[identifier]
                     self._addInstruction(f"read {symbolType}")
-                    self._addInstruction(f"save {identifier}")
+                    self._addInstruction(f"save {self.slotTable[identifier]} {identifier}")
         elif statement.WRITE():
             count = len(statement.expression())
             for i in range(count - 1, -1, -1):
@@ -247,6 +397,7 @@ class CompilerVisitor(GrammarVisitor):
             self._checkBoolExpression(exprType, "while", statement.WHILE())
             self._addInstruction(f"fjmp {secondLabel}")
             self.visit(statement.statement()[0])
+            self._markLine(statement.WHILE().symbol.line)
             self._addInstruction(f"jmp {firstLabel}")
             self._addInstruction(f"label {secondLabel}")
         elif statement.FOR():
@@ -262,61 +413,253 @@ class CompilerVisitor(GrammarVisitor):
             self._checkBoolExpression(exprType, "for", statement.FOR())
             self._addInstruction(f"fjmp {secondLabel}")
             self.visit(statement.statement()[0])
+            self._markLine(statement.FOR().symbol.line)
             if (expressionIds[2] is not None):
                 self.visit(statement.expression()[expressionIds[2]])
                 self._addInstruction("pop")
             self._addInstruction(f"jmp {firstLabel}")
             self._addInstruction(f"label {secondLabel}")
         elif statement.expression():
+            self.lastAssignment = None
             self.visit(statement.expression()[0])
             self._addInstruction("pop")
+            if self.optimize and self.nesting == 1 and self.lastAssignment:
+                identifier, value = self.lastAssignment
+                if (value is not None and self.assignmentCounts.get(identifier) == 1
+                        and identifier not in self.conditionalAssignments):
+                    self.constants[identifier] = value
         elif statement.statement():
             for childStatement in statement.statement():
                 self.visit(childStatement)
+        self.nesting -= 1
+
+
+    def visitProgram(self, program):
+        if self.optimize:
+            self._countAssignments(program)
+        self.visitChildren(program)
+        self._insertConversions()
+
+
+    def _appendConversion(self, instructionList: list[str]):
+        if self.optimize and instructionList[-1].startswith("push int "):
+            instructionList[-1] = f"push float {formatValue(float(instructionList[-1][9:]))}"
+        else:
+            instructionList.append("itof")
+
+
+    def _insertConversions(self):
+        if not self.conversions:
+            return
+        instructionList = list()
+        for idx, instruction in enumerate(self.instructionList):
+            if idx in self.conversions:
+                self._appendConversion(instructionList)
+            instructionList.append(instruction)
+        if len(self.instructionList) in self.conversions:
+            self._appendConversion(instructionList)
+        self.instructionList = instructionList
+        self.conversions = set()
+
+
+
+codegenOptions = ["O", "g", "short-circuit"]
+
+
+antlrParser = None
+
+
+def getAntlrParser():
+    global antlrParser
+    if antlrParser is None:
+        from antlrfrontend import AntlrParser
+        antlrParser = AntlrParser()
+    return antlrParser
 
 
-    def visitProgram(self, program: GrammarParser.ProgramContext):
-        super().visitProgram(program)
-        for offset, idx in enumerate(sorted(list(self.conversions))):
-            self.instructionList.insert(offset + idx, "itof")
+def parseAntlr(source: str):
+    return getAntlrParser().parse(source)
 
 
+frontends = {"antlr": parseAntlr, "pratt": parseSource}
+
+
+def compileSource(source: str, options: dict, phaseTimes: dict = None):
+    phaseTimes = phaseTimes if phaseTimes is not None else dict()
+    start = time.perf_counter()
+    tree, errors = frontends[options.get("frontend", "antlr")](source)
+    phaseTimes["parse"] = time.perf_counter() - start
+    if errors:
+        return errors, None
+    start = time.perf_counter()
+    visitor = CompilerVisitor("O" in options, "g" in options, "short-circuit" in options)
+    visitor.visit(tree)
+    phaseTimes["codegen"] = time.perf_counter() - start
+    if visitor.error:
+        return visitor.errors, None
+    start = time.perf_counter()
+    messages = list()
+    if "O" in options:
+        optimized = peephole(visitor.instructionList)
+        messages.append(f"Peephole optimizer removed {len(visitor.instructionList) - len(optimized)} instructions")
+        variableNames = {slot: name for name, slot in visitor.slotTable.items()}
+        optimized, deadCode = eliminateDeadCode(optimized, variableNames)
+        messages.append(deadCode.format())
+        optimized, hoisted = hoistInvariants(optimized)
+        messages.append(f"Loop-invariant code motion hoisted {hoisted} expressions")
+        optimized, converted = convertCountedLoops(optimized)
+        messages.append(f"Converted {converted} loops to counted loops")
+        visitor.instructionList = optimized
+    instructions = fuse(visitor.instructionList)
+    if "g" in options:
+        instructions = compactLines(instructions)
+    phaseTimes["optimize"] = time.perf_counter() - start
+    return messages, instructions
+
+
+def compileCached(source: str, options: dict):
+    if "cache" not in options:
+        return compileSource(source, options)
+    from cache import CompileCache
+    cache = CompileCache(options["cache"] or None, int(options.get("cache-size", 64)) << 20)
+    keyOptions = {name: options[name] for name in codegenOptions if name in options}
+    keyOptions["frontend"] = options.get("frontend", "antlr")
+    key = cache.key(source, keyOptions)
+    entry = cache.get(key)
+    if entry is None:
+        diagnostics = io.StringIO()
+        with redirect_stderr(diagnostics):
+            messages, instructions = compileSource(source, options)
+        entry = messages, instructions, diagnostics.getvalue()
+        cache.put(key, entry)
+    messages, instructions, diagnostics = entry
+    sys.stderr.write(diagnostics)
+    if "cache-stats" in options:
+        messages.append(cache.formatStats())
+    return messages, instructions
+
+
+def compileRequest(source: str, options: dict):
+    messages, instructions = compileCached(source, options)
+    if "parse-stats" in options:
+        messages.append(getAntlrParser().formatStats())
+    return messages, instructions
+
+
+def compileInput(source: str, options: dict):
+    if "atn-cache" not in options:
+        return compileRequest(source, options)
+    from atncache import defaultAtnCachePath, dfaSize, restoreAtnCache, saveAtnCache
+    atnCachePath = options["atn-cache"] or defaultAtnCachePath()
+    restoreAtnCache(atnCachePath)
+    restoredSize = dfaSize()
+    messages, instructions = compileRequest(source, options)
+    if dfaSize() > restoredSize:
+        saveAtnCache(atnCachePath)
+    return messages, instructions
+
+
+def compileProgram(source: str, options: dict):
+    messages, instructions = compileInput(source, options)
+    if instructions is None:
+        return messages, None
+    return messages, decodeProgram(instructions)
+
+
+def batchOutputPath(sourcePath: str, options: dict):
+    directory = options.get("out-dir") or os.path.dirname(sourcePath)
+    extension = ".bin" if options.get("format", "text") == "binary" else ".txt"
+    return os.path.join(directory, os.path.splitext(os.path.basename(sourcePath))[0] + extension)
+
+
+def collectSources(arguments: list[str]):
+    paths = list()
+    for argument in arguments:
+        if not os.path.isdir(argument):
+            paths.append(argument)
+            continue
+        for directory, _, names in sorted(os.walk(argument)):
+            paths.extend(os.path.join(directory, name) for name in sorted(names) if name.endswith(".lang"))
+    return paths
+
+
+warmupSource = "int i; for (i = 0; i < 2; i = i + 1) if (i == 0) write i, 1.5 . \"\"; else i = -i;"
+
+
+def warmWorker():
+    parseAntlr(warmupSource)
+
+
+def compileBatchFile(sourcePath: str, options: dict):
+    start, fullParses = time.perf_counter(), getAntlrParser().fullParses
+    outputPath = batchOutputPath(sourcePath, options)
+    stderr = io.StringIO()
+    try:
+        with open(sourcePath) as sourceFile:
+            source = sourceFile.read()
+        with redirect_stderr(stderr):
+            messages, instructions = compileCached(source, options)
+    except OSError:
+        messages, instructions = [f"File '{sourcePath}' does not exist"], None
+    diagnostics = stderr.getvalue().splitlines() + messages
+    if instructions is not None:
+        try:
+            writeInstructions(outputPath, instructions, options.get("format", "text") == "binary")
+        except OSError:
+            diagnostics.append(f"Can't open file '{outputPath}'")
+            instructions = None
+    try:
+        with open(os.path.splitext(outputPath)[0] + ".log", "w") as logFile:
+            logFile.writelines(f"{line}\n" for line in diagnostics)
+    except OSError:
+        pass
+    elapsed = time.perf_counter() - start
+    return instructions is not None, elapsed, getAntlrParser().fullParses - fullParses
+
+
+def compileBatch(arguments: list[str], options: dict):
+    from concurrent.futures import ProcessPoolExecutor
+    paths = collectSources(arguments)
+    if "out-dir" in options:
+        os.makedirs(options["out-dir"], exist_ok=True)
+    jobs = int(options.get("jobs") or os.cpu_count() or 1)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(jobs, initializer=warmWorker) as executor:
+        chunkSize = max(1, len(paths) // (jobs * 4))
+        results = list(executor.map(partial(compileBatchFile, options=options), paths, chunksize=chunkSize))
+    for path, (succeeded, elapsed, _) in zip(paths, results):
+        print(f"{path}: {'ok' if succeeded else 'failed'} in {elapsed * 1000:.1f} ms")
+    compiled = sum(succeeded for succeeded, _, _ in results)
+    print(f"Compiled {compiled} of {len(paths)} files in {time.perf_counter() - start:.2f} s with {jobs} workers")
+    if "parse-stats" in options:
+        fullParses = sum(fullParses for _, _, fullParses in results)
+        print(f"Parser: {fullParses} of {len(paths)} files needed full LL prediction")
+
 
 def main():
-    if len(sys.argv) < 3:
+    arguments, options = parseArguments(sys.argv[1:])
+    if "batch" in options:
+        compileBatch(arguments, options)
+        return
+    if len(arguments) < 2:
         print("Error: wrong compiler arguments")
         return
     try:
-        inputFile = open(sys.argv[1])
+        inputFile = open(arguments[0])
     except:
-        print(f"File '{sys.argv[1]}' does not exist")
+        print(f"File '{arguments[0]}' does not exist")
         return
     input = inputFile.read()
     inputFile.close()
-    inputStream = InputStream(input)
-    lexer = GrammarLexer(inputStream)
-    tokenStream = CommonTokenStream(lexer)
-    parser = GrammarParser(tokenStream)
-    parser.removeErrorListeners()
-    errorListener = SyntaxErrorListener()
-    parser.addErrorListener(errorListener)
-    tree = parser.program()
-    if errorListener.errors:
-        for error in errorListener.errors:
-            print(error)
-        return
-    visitor = CompilerVisitor()
-    visitor.visit(tree)
-    if visitor.error:
+    messages, instructions = compileInput(input, options)
+    for message in messages:
+        print(message)
+    if instructions is None:
         return
     try:
-        outputFile = open(sys.argv[2], "w")
-    except:
-        print(f"Can't open file '{sys.argv[2]}'")
-        return
-    for instruction in visitor.instructionList:
-        outputFile.write(f"{instruction}\n")
-    outputFile.close()
+        writeInstructions(arguments[1], instructions, options.get("format", "text") == "binary")
+    except OSError:
+        print(f"Can't open file '{arguments[1]}'")
 
 
 
@@ -0,0 +1,197 @@
+import io
+import os
+import random
+import sys
+from contextlib import redirect_stderr
+from cli import parseArguments
+from bench.programs import TypedProgramGenerator
+from bytecode import decodeProgram
+from compiler import codegenOptions, compileSource
+from frontend import Lexer
+from interpreter import InputError, Interpreter
+
+
+
+differentialCases = [
+    ("constant folded with a variable read later", "int x;\nread x;\nwrite (2 + x) * 3;\nwrite 2 + x + 1;\n", "5\n"),
+    ("string assigned to a float", "float f;\nf = \"a\";\nwrite f;\n", ""),
+    ("string assigned to an int", "int i;\ni = \"a\";\nwrite i;\nwrite i + 1.5;\n", ""),
+    ("int assigned to a bool", "bool b;\nb = 3;\nwrite b;\n", ""),
+    ("int constant assigned to a float", "float g;\ng = 3;\nwrite g, g + 1;\n", ""),
+    ("assignment in a skipped || operand", "int x;\nbool flag;\nread flag;\nflag || (x = 5) > 0;\nwrite x;\n", "true\n"),
+    (
+        "assignments in nested short-circuit operands",
+        "int x, y, z;\nbool flag;\nread flag;\n!flag && ((y = 7) > 0 || (z = 2) > 0);\nwrite x, y, z;\n", "true\n"
+    )
+]
+
+
+class ProgramGenerator:
+    types = ["int", "float", "bool", "string"]
+    literals = {
+        "int": lambda rng: str(rng.randint(0, 99)),
+        "float": lambda rng: f"{rng.randint(0, 99)}.{rng.randint(0, 99)}",
+        "bool": lambda rng: rng.choice(["true", "false"]),
+        "string": lambda rng: rng.choice(["\"\"", "\"a\"", "\"hello world\"", "\"x\ny\""])
+    }
+    binaryOperators = ["+", "-", "*", "/", "%", ".", "<", ">", "==", "!=", "&&", "||", "="]
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.variables = list()
+
+    def expression(self, depth: int = 0):
+        rng = self.rng
+        choice = rng.random()
+        if depth > 3 or choice < 0.3:
+            if self.variables and rng.random() < 0.5:
+                return rng.choice(self.variables)
+            return ProgramGenerator.literals[rng.choice(ProgramGenerator.types)](rng)
+        if choice < 0.45:
+            return rng.choice(["-", "!"]) + self.expression(depth + 1)
+        if choice < 0.6:
+            return f"({self.expression(depth + 1)})"
+        operator = rng.choice(ProgramGenerator.binaryOperators)
+        if operator == "=" and self.variables:
+            return f"{rng.choice(self.variables)} = {self.expression(depth + 1)}"
+        return f"{self.expression(depth + 1)} {operator} {self.expression(depth + 1)}"
+
+    def statement(self, depth: int = 0):
+        rng = self.rng
+        choice = rng.randrange(9 if depth < 3 else 5)
+        if choice == 0:
+            names = [f"v{len(self.variables) + idx}" for idx in range(rng.randint(1, 3))]
+            self.variables.extend(names)
+            return f"{rng.choice(ProgramGenerator.types)} {', '.join(names)};"
+        if choice == 1 and self.variables:
+            return f"read {', '.join(rng.sample(self.variables, min(len(self.variables), 2)))};"
+        if choice == 2:
+            return f"write {', '.join(self.expression() for _ in range(rng.randint(1, 3)))};"
+        if choice == 3:
+            return ";"
+        if choice == 4:
+            return f"{self.expression()};"
+        if choice == 5:
+            return "{ " + " ".join(self.statement(depth + 1) for _ in range(rng.randint(0, 3))) + " }"
+        if choice == 6:
+            condition, body = self.expression(), self.statement(depth + 1)
+            otherwise = f" else {self.statement(depth + 1)}" if rng.random() < 0.5 else ""
+            return f"if ({condition}) {body}{otherwise}"
+        if choice == 7:
+            return f"while ({self.expression()}) {self.statement(depth + 1)}"
+        initial = self.expression() if rng.random() < 0.7 else ""
+        condition = self.expression()
+        update = self.expression() if rng.random() < 0.7 else ""
+        return f"for ({initial}; {condition}; {update}) {self.statement(depth + 1)}"
+
+    def program(self):
+        self.variables = list()
+        return "\n".join(self.statement() for _ in range(self.rng.randint(1, 8))) + "\n"
+
+    def mutate(self, source: str):
+        rng = self.rng
+        tokens = [token.text for token in Lexer(source, lambda *_: None).tokenize()[:-1]]
+        junk = [";", ",", "(", ")", "{", "}", "=", "+", "else", "int", "x", "1", "$", "&", "\""]
+        for _ in range(rng.randint(1, 2)):
+            idx = rng.randrange(len(tokens) + 1)
+            action = rng.randrange(3)
+            if action == 0 and idx < len(tokens):
+                del tokens[idx]
+            elif action == 1 and idx < len(tokens):
+                tokens[idx] = rng.choice(junk)
+            else:
+                tokens.insert(idx, rng.choice(junk))
+        separator = "\n" if rng.random() < 0.3 else " "
+        return separator.join(tokens) + "\n"
+
+
+class BoundedProgramGenerator(TypedProgramGenerator):
+    def assignment(self):
+        statement = super().assignment()
+        target = statement.split(" ", 1)[0]
+        if target in self.variables["string"]:
+            return f"{target} = {self.literal('string')} . {self.leaf('string')};"
+        return statement
+
+
+def compileWith(source: str, options: dict):
+    stderr = io.StringIO()
+    with redirect_stderr(stderr):
+        messages, instructions = compileSource(source, options)
+    return stderr.getvalue(), messages, instructions
+
+
+def checkSource(source: str, options: dict):
+    expected = compileWith(source, dict(options, frontend="antlr"))
+    return compileWith(source, dict(options, frontend="pratt")) == expected
+
+
+def runWith(source: str, options: dict, stdin: str):
+    _, messages, instructions = compileWith(source, dict(options, frontend="pratt"))
+    if instructions is None:
+        return "\n".join(messages)
+    output = io.StringIO()
+    try:
+        Interpreter(decodeProgram(instructions)).run(stdin, output)
+    except (InputError, ArithmeticError, ValueError) as error:
+        output.write(f"\n{type(error).__name__}: {error}")
+    return output.getvalue()
+
+
+def checkOptimized(source: str, stdin: str, options: dict):
+    failures = list()
+    for extra in ({}, {"short-circuit": ""}):
+        reference = dict(options, **extra)
+        if runWith(source, dict(reference, O=""), stdin) != runWith(source, reference, stdin):
+            failures.append(" ".join(["-O"] + [f"--{name}" for name in extra]))
+    return failures
+
+
+def differential(cases: list, count: int, rng: random.Random, options: dict):
+    cases = differentialCases + [(name, source, "") for name, source in cases]
+    cases.extend((f"generated #{idx}", BoundedProgramGenerator(rng).program(20), "") for idx in range(count))
+    failures = 0
+    for name, source, stdin in cases:
+        differing = checkOptimized(source, stdin, options)
+        if differing:
+            failures += 1
+            print(f"Output differs with {', '.join(differing)} on {name}:\n{source}")
+    print(f"{len(cases) - failures} of {len(cases)} programs print the same output with and without -O")
+    return failures
+
+
+def main():
+    arguments, options = parseArguments(sys.argv[1:])
+    count, rng = int(options.get("count", 1000)), random.Random(int(options.get("seed", 0)))
+    samplesDirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+    paths = arguments or sorted(
+        os.path.join(samplesDirectory, name) for name in os.listdir(samplesDirectory) if name.endswith(".lang")
+    )
+    cases = list()
+    for path in paths:
+        with open(path) as sourceFile:
+            cases.append((path, sourceFile.read()))
+    if "differential" in options:
+        codegen = {
+            name: options[name] for name in codegenOptions if name in options and name not in ("O", "short-circuit")
+        }
+        if differential(cases, count, rng, codegen):
+            sys.exit(1)
+        return
+    generator = ProgramGenerator(rng)
+    for idx in range(count):
+        source = generator.program()
+        cases.append((f"generated #{idx}", source))
+        cases.append((f"mutated #{idx}", generator.mutate(source)))
+    failures, codegen = 0, {name: options[name] for name in codegenOptions if name in options}
+    for name, source in cases:
+        if not checkSource(source, codegen):
+            failures += 1
+            print(f"Front ends differ on {name}:\n{source}")
+    print(f"{len(cases) - failures} of {len(cases)} programs conform")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from contextlib import redirect_stderr
+from cli import parseArguments
+
+
+
+def defaultSocketPath():
+    runtimeDirectory = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(runtimeDirectory, f"plac-{os.getuid()}.sock")
+
+
+def requestCompile(socketPath: str, source: str, options: dict):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(socketPath)
+            connection.sendall(json.dumps({"source": source, "options": options}).encode() + b"\n")
+            with connection.makefile("rb") as responseFile:
+                response = json.loads(responseFile.readline())
+    except (OSError, ValueError):
+        return None
+    if "error" in response:
+        return None
+    return response
+
+
+class CompileHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = self.server.compile(request["source"], request["options"])
+            except Exception as error:
+                response = {"error": repr(error)}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socketPath: str):
+        import compiler
+        self.compiler = compiler
+        self.lock = threading.Lock()
+        compiler.warmWorker()
+        super().__init__(socketPath, CompileHandler)
+
+    def compile(self, source: str, options: dict):
+        stderr = io.StringIO()
+        with self.lock, redirect_stderr(stderr):
+            messages, instructions = self.compiler.compileRequest(source, options)
+        return {"stderr": stderr.getvalue(), "messages": messages, "instructions": instructions}
+
+
+def serve(socketPath: str):
+    if os.path.exists(socketPath):
+        if requestCompile(socketPath, "", {}) is not None:
+            print(f"Compile server is already running on '{socketPath}'")
+            return
+        os.unlink(socketPath)
+    server = CompileServer(socketPath)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socketPath)
+
+
+def main():
+    _, options = parseArguments(sys.argv[1:])
+    serve(options.get("socket") or defaultSocketPath())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,648 @@
+import re
+import sys
+
+
+
+class TokenType:
+    EOF, EPSILON = -1, -2
+    SEMI, COMMA, LBRACE, RBRACE, LPAREN, RPAREN, MINUS, NOT, MUL, DIV = range(1, 11)
+    MOD, PLUS, CONCAT, LT, GT, EQ, NE, AND, OR, ASSIGN = range(11, 21)
+    INT, FLOAT, BOOL, STRING, READ, WRITE, IF, ELSE, WHILE, FOR = range(23, 33)
+    BOOL_LIT, STRING_LIT, FLOAT_LIT, INT_LIT, ID = range(33, 38)
+    literals = {
+        ';': SEMI, ',': COMMA, '{': LBRACE, '}': RBRACE, '(': LPAREN, ')': RPAREN,
+        '-': MINUS, '!': NOT, '*': MUL, '/': DIV, '%': MOD, '+': PLUS, '.': CONCAT,
+        '<': LT, '>': GT, '==': EQ, '!=': NE, '&&': AND, '||': OR, '=': ASSIGN,
+        'int': INT, 'float': FLOAT, 'bool': BOOL, 'string': STRING, 'read': READ,
+        'write': WRITE, 'if': IF, 'else': ELSE, 'while': WHILE, 'for': FOR
+    }
+    names = {tokenType: f"'{text}'" for text, tokenType in literals.items()}
+    names.update({
+        EOF: "<EOF>", BOOL_LIT: "BOOL_LIT", STRING_LIT: "STRING_LIT",
+        FLOAT_LIT: "FLOAT_LIT", INT_LIT: "INT_LIT", ID: "ID"
+    })
+
+
+class Token:
+    __slots__ = ("type", "text", "line", "column")
+
+    def __init__(self, tokenType: int, text: str, line: int, column: int):
+        self.type = tokenType
+        self.text = text
+        self.line = line
+        self.column = column
+
+
+def escapeText(text: str):
+    return text.replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+
+
+def displayToken(token: Token):
+    if token.type == TokenType.EOF:
+        return "'<EOF>'"
+    return f"'{escapeText(token.text)}'"
+
+
+def reportLexerError(line: int, column: int, text: str):
+    print(f"line {line}:{column} token recognition error at: '{escapeText(text)}'", file=sys.stderr)
+
+
+class Lexer:
+    tokenPattern = re.compile(r"""
+        (?P<skip>[ \t\r\n]+|//[^\r\n]*)
+        |(?P<string>"[^"]*")
+        |(?P<float>[0-9]+\.[0-9]+)
+        |(?P<int>[0-9]+)
+        |(?P<id>[a-zA-Z][a-zA-Z0-9_]*)
+        |(?P<operator>==|!=|&&|\|\||[;,{}()\-!*/%+.<>=])
+    """, re.VERBOSE)
+    keywordTypes = {"true": TokenType.BOOL_LIT, "false": TokenType.BOOL_LIT}
+    groupTypes = {"string": TokenType.STRING_LIT, "float": TokenType.FLOAT_LIT, "int": TokenType.INT_LIT}
+
+    def __init__(self, source: str, onError = reportLexerError):
+        self.source = source
+        self.onError = onError
+
+    def tokenize(self):
+        source, tokens = self.source, list()
+        position, line, lineStart = 0, 1, 0
+        match = Lexer.tokenPattern.match
+        while position < len(source):
+            found = match(source, position)
+            if found is None:
+                end = self._recognitionError(position, line, position - lineStart)
+            else:
+                end, group = found.end(), found.lastgroup
+                if group != "skip":
+                    text = found.group()
+                    if group == "id":
+                        tokenType = TokenType.literals.get(text) or Lexer.keywordTypes.get(text, TokenType.ID)
+                    elif group == "operator":
+                        tokenType = TokenType.literals[text]
+                    else:
+                        tokenType = Lexer.groupTypes[group]
+                    tokens.append(Token(tokenType, text, line, position - lineStart))
+                    if group != "string":
+                        position = end
+                        continue
+            newlines = source.count("\n", position, end)
+            if newlines:
+                line += newlines
+                lineStart = source.rindex("\n", position, end) + 1
+            position = end
+        tokens.append(Token(TokenType.EOF, "<EOF>", line, position - lineStart))
+        return tokens
+
+    def _recognitionError(self, position: int, line: int, column: int):
+        source = self.source
+        if source[position] == '"':
+            end = len(source)
+        elif source[position] in "&|" and position + 1 < len(source):
+            end = position + 2
+        else:
+            end = position + 1
+        self.onError(line, column, source[position:end])
+        return end
+
+
+class TerminalNode:
+    def __init__(self, symbol: Token):
+        self.symbol = symbol
+
+    def getText(self):
+        return self.symbol.text
+
+    def getChildCount(self):
+        return 0
+
+    def accept(self, visitor):
+        return visitor.visitTerminal(self)
+
+
+class RuleNode:
+    def __init__(self, children: list):
+        self.children = children
+
+    def getChildCount(self):
+        return len(self.children)
+
+    def getChild(self, idx: int):
+        return self.children[idx]
+
+    def getText(self):
+        return "".join(child.getText() for child in self.children)
+
+    def _nodes(self, nodeType, idx):
+        nodes = [child for child in self.children if isinstance(child, nodeType)]
+        if idx is None:
+            return nodes
+        return nodes[idx] if idx < len(nodes) else None
+
+    def _tokens(self, tokenType: int, idx):
+        tokens = [
+            child for child in self.children
+            if isinstance(child, TerminalNode) and child.symbol.type == tokenType
+        ]
+        if idx is None:
+            return tokens
+        return tokens[idx] if idx < len(tokens) else None
+
+    def _token(self, tokenType: int):
+        return self._tokens(tokenType, 0)
+
+
+class ProgramNode(RuleNode):
+    def statement(self, idx = None):
+        return self._nodes(StatementNode, idx)
+
+    def accept(self, visitor):
+        return visitor.visitProgram(self)
+
+
+class StatementNode(RuleNode):
+    def type_(self):
+        return self._nodes(TypeNode, 0)
+
+    def ID(self, idx = None):
+        return self._tokens(TokenType.ID, idx)
+
+    def READ(self):
+        return self._token(TokenType.READ)
+
+    def WRITE(self):
+        return self._token(TokenType.WRITE)
+
+    def IF(self):
+        return self._token(TokenType.IF)
+
+    def ELSE(self):
+        return self._token(TokenType.ELSE)
+
+    def WHILE(self):
+        return self._token(TokenType.WHILE)
+
+    def FOR(self):
+        return self._token(TokenType.FOR)
+
+    def expression(self, idx = None):
+        return self._nodes(ExpressionNode, idx)
+
+    def statement(self, idx = None):
+        return self._nodes(StatementNode, idx)
+
+    def accept(self, visitor):
+        return visitor.visitStatement(self)
+
+
+class TypeNode(RuleNode):
+    def INT(self):
+        return self._token(TokenType.INT)
+
+    def FLOAT(self):
+        return self._token(TokenType.FLOAT)
+
+    def BOOL(self):
+        return self._token(TokenType.BOOL)
+
+    def STRING(self):
+        return self._token(TokenType.STRING)
+
+    def accept(self, visitor):
+        return visitor.visitType(self)
+
+
+class ExpressionNode(RuleNode):
+    def __init__(self, children: list, uop: Token = None, bop: Token = None):
+        super().__init__(children)
+        self.uop = uop
+        self.bop = bop
+
+    def primary(self):
+        return self._nodes(PrimaryNode, 0)
+
+    def expression(self, idx = None):
+        return self._nodes(ExpressionNode, idx)
+
+    def accept(self, visitor):
+        return visitor.visitExpression(self)
+
+
+class PrimaryNode(RuleNode):
+    def expression(self):
+        return self._nodes(ExpressionNode, 0)
+
+    def INT_LIT(self):
+        return self._token(TokenType.INT_LIT)
+
+    def FLOAT_LIT(self):
+        return self._token(TokenType.FLOAT_LIT)
+
+    def BOOL_LIT(self):
+        return self._token(TokenType.BOOL_LIT)
+
+    def STRING_LIT(self):
+        return self._token(TokenType.STRING_LIT)
+
+    def ID(self):
+        return self._token(TokenType.ID)
+
+    def accept(self, visitor):
+        return visitor.visitPrimary(self)
+
+
+class ParseError(Exception):
+    def __init__(self, token: Token, message: str = None, state: str = None):
+        super().__init__(message)
+        self.token = token
+        self.message = message
+        self.state = state
+
+
+class Parser:
+    expressionStart = {
+        TokenType.LPAREN, TokenType.MINUS, TokenType.NOT, TokenType.BOOL_LIT,
+        TokenType.STRING_LIT, TokenType.FLOAT_LIT, TokenType.INT_LIT, TokenType.ID
+    }
+    primaryStart = expressionStart - {TokenType.MINUS, TokenType.NOT}
+    typeStart = {TokenType.INT, TokenType.FLOAT, TokenType.BOOL, TokenType.STRING}
+    statementStart = expressionStart | typeStart | {
+        TokenType.SEMI, TokenType.LBRACE, TokenType.READ, TokenType.WRITE,
+        TokenType.IF, TokenType.WHILE, TokenType.FOR
+    }
+    binaryPrecedence = {
+        TokenType.MUL: 7, TokenType.DIV: 7, TokenType.MOD: 7,
+        TokenType.PLUS: 6, TokenType.MINUS: 6, TokenType.CONCAT: 6,
+        TokenType.LT: 5, TokenType.GT: 5, TokenType.EQ: 4, TokenType.NE: 4,
+        TokenType.AND: 3, TokenType.OR: 2, TokenType.ASSIGN: 1
+    }
+    identifierFollow = {TokenType.ID}
+    endFollow = {TokenType.EPSILON}
+    thenFollow = {TokenType.EPSILON, TokenType.ELSE}
+    operandFollow = set(binaryPrecedence) | {TokenType.EPSILON}
+    programFollow = statementStart | {TokenType.EOF}
+    blockFollow = statementStart | {TokenType.RBRACE}
+    semiFollow = {TokenType.SEMI}
+    commaFollow = {TokenType.COMMA}
+    parenFollow = {TokenType.RPAREN}
+    forInitStart = expressionStart | {TokenType.SEMI}
+    forUpdateStart = expressionStart | {TokenType.RPAREN}
+    loopFollow = {
+        "program": programFollow, "declaration": identifierFollow, "read": identifierFollow,
+        "write": expressionStart, "block": blockFollow
+    }
+
+    def __init__(self, tokens: list[Token]):
+        self.tokens = tokens + tokens[-1:] * 2
+        self.position = 0
+        self.errors = list()
+        self.recovering = False
+        self.lastErrorIndex = -1
+        self.lastErrorStates = None
+        self.speculating = 0
+        self.loopFollow = {state: set(follow) for state, follow in Parser.loopFollow.items()}
+
+    def _peek(self, offset: int = 0):
+        return self.tokens[self.position + offset]
+
+    def _consume(self):
+        token = self.tokens[self.position]
+        if self.recovering:
+            self._endErrorCondition()
+        if token.type != TokenType.EOF:
+            self.position += 1
+        return TerminalNode(token)
+
+    def _endErrorCondition(self):
+        if not self.speculating:
+            self.recovering = False
+            self.lastErrorIndex = -1
+            self.lastErrorStates = None
+
+    def _report(self, token: Token, message: str):
+        self.recovering = True
+        self.errors.append(f"Syntax error at line {token.line} {message}")
+
+    def _reportError(self, error: ParseError):
+        if not self.recovering:
+            self._report(error.token, error.message)
+
+    def _reportExtraneous(self, expected: set):
+        if not self.recovering:
+            token = self._peek()
+            self._report(token, f"extraneous input {displayToken(token)} expecting {self._formatExpected(expected)}")
+
+    def _reportMissing(self, tokenType: int):
+        if not self.recovering:
+            token = self._peek()
+            self._report(token, f"missing {TokenType.names[tokenType]} at {displayToken(token)}")
+
+    def _formatExpected(self, expected: set):
+        names = [TokenType.names[tokenType] for tokenType in sorted(expected)]
+        return names[0] if len(names) == 1 else "{" + ", ".join(names) + "}"
+
+    def _expected(self, follow: set, ctx: tuple):
+        if TokenType.EPSILON not in follow:
+            return follow
+        expected = set(follow)
+        while TokenType.EPSILON in follow and ctx is not None:
+            follow, ctx = ctx
+            expected |= follow
+        expected.discard(TokenType.EPSILON)
+        if TokenType.EPSILON in follow:
+            expected.add(TokenType.EOF)
+        return expected
+
+    def _recoverySet(self, ctx: tuple):
+        recoverySet = set()
+        while ctx is not None:
+            follow, ctx = ctx
+            recoverySet |= follow
+        recoverySet.discard(TokenType.EPSILON)
+        return recoverySet
+
+    def _recover(self, error: ParseError, ctx: tuple):
+        if self.lastErrorIndex == self.position and error.state in self.lastErrorStates:
+            if self._peek().type != TokenType.EOF:
+                self.position += 1
+        self.lastErrorIndex = self.position
+        if self.lastErrorStates is None:
+            self.lastErrorStates = list()
+        self.lastErrorStates.append(error.state)
+        self._consumeUntil(self._recoverySet(ctx))
+
+    def _consumeUntil(self, tokens: set):
+        while self._peek().type != TokenType.EOF and self._peek().type not in tokens:
+            self.position += 1
+
+    def _mismatched(self, state: str, expected: set):
+        token = self._peek()
+        if self.speculating:
+            return ParseError(token)
+        expecting = self._formatExpected(expected)
+        return ParseError(token, f"mismatched input {displayToken(token)} expecting {expecting}", state)
+
+    def _noViableAlternative(self, state: str, start: int, token: Token):
+        if self.speculating:
+            return ParseError(token)
+        end = self.tokens.index(token, start)
+        text = "".join(
+            self.tokens[idx].text for idx in range(start, end + 1)
+            if self.tokens[idx].type != TokenType.EOF
+        ) if self.tokens[start].type != TokenType.EOF else "<EOF>"
+        return ParseError(token, f"no viable alternative at input '{escapeText(text)}'", state)
+
+    def _sync(self, state: str, expected: set, ctx: tuple):
+        if self._peek().type in expected or self.recovering or self.speculating:
+            return
+        if self._peek(1).type in expected:
+            self._reportExtraneous(expected)
+            self._consume()
+            return
+        raise self._mismatched(state, expected)
+
+    def _syncLoop(self, state: str, ctx: tuple):
+        expected = self.loopFollow[state]
+        if self._peek().type in expected or self.recovering or self.speculating:
+            return
+        self._reportExtraneous(expected)
+        expected |= self._recoverySet(ctx)
+        self._consumeUntil(expected)
+
+    def _match(self, tokenType: int, state: str, follow: set, ctx: tuple):
+        if self.tokens[self.position].type == tokenType:
+            return self._consume()
+        if self.speculating:
+            raise ParseError(self._peek())
+        if self._peek(1).type == tokenType:
+            self._reportExtraneous({tokenType})
+            self._consume()
+            return self._consume()
+        if self._peek().type in self._expected(follow, ctx):
+            self._reportMissing(tokenType)
+            token = self._peek()
+            return TerminalNode(Token(tokenType, f"<missing {TokenType.names[tokenType]}>", token.line, token.column))
+        raise self._mismatched(state, {tokenType})
+
+    def program(self):
+        children = list()
+        try:
+            self._sync("programStart", Parser.programFollow, None)
+            while self._peek().type in Parser.statementStart:
+                children.append(self.statement((Parser.programFollow, None)))
+                self._syncLoop("program", None)
+            children.append(self._match(TokenType.EOF, "programEnd", Parser.endFollow, None))
+        except ParseError as error:
+            self._reportError(error)
+            self._recover(error, None)
+        return ProgramNode(children)
+
+    def statement(self, ctx: tuple):
+        children = list()
+        try:
+            self._statement(children, ctx)
+        except ParseError as error:
+            if self.speculating:
+                raise
+            self._reportError(error)
+            self._recover(error, ctx)
+        return StatementNode(children)
+
+    def _statement(self, children: list, ctx: tuple):
+        tokenType = self.tokens[self.position].type
+        if tokenType not in Parser.statementStart:
+            self._sync("statement", Parser.statementStart, ctx)
+            tokenType = self._peek().type
+        if tokenType == TokenType.SEMI:
+            children.append(self._consume())
+        elif tokenType in Parser.typeStart:
+            children.append(TypeNode([self._consume()]))
+            self._identifierList(children, "declarationStart", "declaration", ctx)
+        elif tokenType == TokenType.READ:
+            children.append(self._consume())
+            self._identifierList(children, "readStart", "read", ctx)
+        elif tokenType == TokenType.WRITE:
+            children.append(self._consume())
+            self._expressionList(children, ctx)
+        elif tokenType == TokenType.LBRACE:
+            children.append(self._consume())
+            self._sync("blockStart", Parser.blockFollow, ctx)
+            while self._peek().type in Parser.statementStart:
+                children.append(self.statement((Parser.blockFollow, ctx)))
+                self._syncLoop("block", ctx)
+            children.append(self._match(TokenType.RBRACE, "blockEnd", Parser.endFollow, ctx))
+        elif tokenType == TokenType.IF:
+            self._ifStatement(children, ctx)
+        elif tokenType == TokenType.WHILE:
+            children.append(self._consume())
+            children.append(self._match(TokenType.LPAREN, "whileOpen", Parser.expressionStart, ctx))
+            children.append(self.expression((Parser.parenFollow, ctx)))
+            children.append(self._match(TokenType.RPAREN, "whileClose", Parser.statementStart, ctx))
+            children.append(self.statement((Parser.endFollow, ctx)))
+        elif tokenType == TokenType.FOR:
+            self._forStatement(children, ctx)
+        elif tokenType in Parser.expressionStart:
+            children.append(self.expression((Parser.semiFollow, ctx)))
+            children.append(self._match(TokenType.SEMI, "expressionEnd", Parser.endFollow, ctx))
+        else:
+            raise self._noViableAlternative("statement", self.position, self._peek())
+
+    def _ifStatement(self, children: list, ctx: tuple):
+        children.append(self._consume())
+        children.append(self._match(TokenType.LPAREN, "ifOpen", Parser.expressionStart, ctx))
+        children.append(self.expression((Parser.parenFollow, ctx)))
+        children.append(self._match(TokenType.RPAREN, "ifClose", Parser.statementStart, ctx))
+        children.append(self.statement((Parser.thenFollow, ctx)))
+        if self._peek().type != TokenType.ELSE:
+            return
+        openIfs = self._openIfs(ctx)
+        if openIfs:
+            if self.speculating:
+                return
+            self._predictElse(openIfs, ctx)
+        children.append(self._consume())
+        children.append(self.statement((Parser.endFollow, ctx)))
+
+    def _openIfs(self, ctx: tuple):
+        count = 0
+        while ctx is not None and TokenType.EPSILON in ctx[0]:
+            count += TokenType.ELSE in ctx[0]
+            ctx = ctx[1]
+        return count
+
+    def _openTail(self, node: StatementNode):
+        count = 0
+        while node.children and isinstance(node.children[-1], StatementNode):
+            count += node.children[0].symbol.type == TokenType.IF and len(node.children) == 5
+            node = node.children[-1]
+        return count
+
+    def _predictElse(self, openIfs: int, ctx: tuple):
+        start = self.position
+        openIfs -= 1
+        self.speculating += 1
+        try:
+            while True:
+                self._consume()
+                openIfs += self._openTail(self.statement((Parser.endFollow, ctx)))
+                token = self._peek()
+                if openIfs == 0:
+                    return
+                if token.type != TokenType.ELSE:
+                    if token.type in self._expected(Parser.endFollow, ctx):
+                        return
+                    raise ParseError(token)
+                openIfs -= 1
+        except ParseError as error:
+            token = error.token
+        finally:
+            self.speculating -= 1
+            self.position = start
+        raise self._noViableAlternative("else", start, token)
+
+    def _forStatement(self, children: list, ctx: tuple):
+        children.append(self._consume())
+        children.append(self._match(TokenType.LPAREN, "forOpen", Parser.forInitStart, ctx))
+        self._sync("forInit", Parser.forInitStart, ctx)
+        if self._peek().type in Parser.expressionStart:
+            children.append(self.expression((Parser.semiFollow, ctx)))
+        children.append(self._match(TokenType.SEMI, "forInitEnd", Parser.expressionStart, ctx))
+        children.append(self.expression((Parser.semiFollow, ctx)))
+        children.append(self._match(TokenType.SEMI, "forConditionEnd", Parser.forUpdateStart, ctx))
+        self._sync("forUpdate", Parser.forUpdateStart, ctx)
+        if self._peek().type in Parser.expressionStart:
+            children.append(self.expression((Parser.parenFollow, ctx)))
+        children.append(self._match(TokenType.RPAREN, "forClose", Parser.statementStart, ctx))
+        children.append(self.statement((Parser.endFollow, ctx)))
+
+    def _identifierList(self, children: list, start: str, loop: str, ctx: tuple):
+        self._sync(start, Parser.identifierFollow, ctx)
+        state = start
+        while True:
+            if self._peek().type != TokenType.ID:
+                raise self._noViableAlternative(state, self.position, self._peek())
+            separator = self._peek(1).type
+            if separator not in (TokenType.COMMA, TokenType.SEMI):
+                raise self._noViableAlternative(state, self.position, self._peek(1))
+            children.append(self._consume())
+            children.append(self._consume())
+            if separator == TokenType.SEMI:
+                return
+            self._syncLoop(loop, ctx)
+            state = loop
+
+    def _expressionList(self, children: list, ctx: tuple):
+        self._sync("writeStart", Parser.expressionStart, ctx)
+        state = "writeStart"
+        while True:
+            start = self.position
+            self.speculating += 1
+            try:
+                expression = self.expression((Parser.commaFollow, ctx))
+                if self._peek().type not in (TokenType.COMMA, TokenType.SEMI):
+                    raise ParseError(self._peek())
+            except ParseError as error:
+                token = error.token
+                self.position = start
+            else:
+                token = None
+            finally:
+                self.speculating -= 1
+            if token is not None:
+                raise self._noViableAlternative(state, start, token)
+            self._endErrorCondition()
+            children.append(expression)
+            separator = self._consume()
+            children.append(separator)
+            if separator.symbol.type == TokenType.SEMI:
+                return
+            self._syncLoop("write", ctx)
+            state = "write"
+
+    def expression(self, ctx: tuple, minPrecedence: int = 1):
+        left = None
+        try:
+            tokenType = self.tokens[self.position].type
+            if tokenType not in Parser.expressionStart:
+                self._sync("expression", Parser.expressionStart, ctx)
+                tokenType = self._peek().type
+            if tokenType in Parser.primaryStart:
+                left = ExpressionNode([self._primary((Parser.operandFollow, ctx))])
+            elif tokenType in (TokenType.MINUS, TokenType.NOT):
+                uop = self._consume()
+                left = ExpressionNode([uop, self.expression((Parser.operandFollow, ctx), 8)], uop=uop.symbol)
+            else:
+                raise self._noViableAlternative("expression", self.position, self._peek())
+            while Parser.binaryPrecedence.get(self.tokens[self.position].type, 0) >= minPrecedence:
+                bop = self._consume()
+                precedence = Parser.binaryPrecedence[bop.symbol.type]
+                nextPrecedence = precedence if bop.symbol.type == TokenType.ASSIGN else precedence + 1
+                right = self.expression((Parser.operandFollow, ctx), nextPrecedence)
+                left = ExpressionNode([left, bop, right], bop=bop.symbol)
+        except ParseError as error:
+            if self.speculating:
+                raise
+            self._reportError(error)
+            self._recover(error, ctx)
+        return left if left is not None else ExpressionNode([])
+
+    def _primary(self, ctx: tuple):
+        children = list()
+        try:
+            if self.tokens[self.position].type == TokenType.LPAREN:
+                children.append(self._consume())
+                children.append(self.expression((Parser.parenFollow, ctx)))
+                children.append(self._match(TokenType.RPAREN, "primaryClose", Parser.endFollow, ctx))
+            else:
+                children.append(self._consume())
+        except ParseError as error:
+            if self.speculating:
+                raise
+            self._reportError(error)
+            self._recover(error, ctx)
+        return PrimaryNode(children)
+
+
+def parseSource(source: str, onLexerError = reportLexerError):
+    parser = Parser(Lexer(source, onLexerError).tokenize())
+    tree = parser.program()
+    return tree, parser.errors
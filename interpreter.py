@@ -1,117 +1,430 @@
+import io
+import operator
 import sys
+import time
+from bytecode import Opcode, Program, readProgram
+from cli import parseArguments
+from rope import concat
+from streams import InputReader, OutputWriter, openInput, openOutput
 
 
 
-def loadProgram():
-    if len(sys.argv) < 2:
-        print("Error: Program file not specified")
-        exit(0)
-    labels, instructions = list(), list()
+def loadProgram(path: str):
     try:
-        with open(sys.argv[1]) as inputFile:
-            for idx, line in enumerate(inputFile):
-                line = line.strip()
-                parameters = line.split(" ", maxsplit=2)
-                if parameters[0] == "label":
-                    labelIdx = int(parameters[1])
-                    if labelIdx >= len(labels):
-                        labels.extend([0] * (labelIdx + 1 - len(labels)))
-                    labels[labelIdx] = idx
-                instructions.append(tuple(parameters))
-    except:
-        print(f"File '{sys.argv[1]}' does not exist")
+        return readProgram(path)
+    except OSError:
+        print(f"File '{path}' does not exist")
         exit(0)
-    return labels, instructions
+    except (KeyError, IndexError, ValueError):
+        print(f"File '{path}' is not a valid program")
+        exit(0)
+
+
+class InputError(Exception):
+    pass
+
+
+def divide(a, b):
+    return a // b if type(a) == int else a / b
 
 
 class Operations:
     unary = {
-        "uminus": lambda a: -a, 
-        "not": lambda a: not a, 
-        "itof": float
+        Opcode.UMINUS: lambda a: -a,
+        Opcode.NOT: lambda a: not a,
+        Opcode.ITOF: float
     }
     binary = {
-        "add": lambda a, b: a + b, "sub": lambda a, b: a - b, 
-        "mul": lambda a, b: a * b, 
-        "div": lambda a, b: a // b if type(a) == int else a / b,
-        "mod": lambda a, b: a % b, "concat": lambda a, b: a + b,
-        "and": lambda a, b: a and b, "or": lambda a, b: a or b,
-        "gt": lambda a, b: a > b, "lt": lambda a, b: a < b, 
-        "eq": lambda a, b: a == b,
+        Opcode.ADD: lambda a, b: a + b, Opcode.SUB: lambda a, b: a - b,
+        Opcode.MUL: lambda a, b: a * b,
+        Opcode.DIV: divide,
+        Opcode.MOD: lambda a, b: a % b, Opcode.CONCAT: concat,
+        Opcode.AND: lambda a, b: a and b, Opcode.OR: lambda a, b: a or b,
+        Opcode.GT: lambda a, b: a > b, Opcode.LT: lambda a, b: a < b,
+        Opcode.EQ: lambda a, b: a == b, Opcode.NE: lambda a, b: a != b,
     }
 
 
-def getValueOfType(typeStr: str, value, rmQuotes = False):
-    match typeStr:
-        case "int":
-            return int(value)
-        case "float":
-            return float(value)
-        case "bool":
-            if value == "true":
-                return True
-            elif value == "false":
-                return False
-            raise ValueError()
-        case "string":
-            if rmQuotes:
-                return value[1:-1]
-            return value
-    raise ValueError()
-
-
-def handleInstruction(stack: list, instruction: tuple):
-    if instruction[0] in Operations.unary:
-        stack[-1] = Operations.unary[instruction[0]](stack[-1])
-    elif instruction[0] in Operations.binary:
+def handleInstruction(stack: list, opcode: int):
+    if opcode in Operations.unary:
+        stack[-1] = Operations.unary[opcode](stack[-1])
+    elif opcode in Operations.binary:
         value = stack.pop()
-        stack[-1] = Operations.binary[instruction[0]](stack[-1], value)
+        stack[-1] = Operations.binary[opcode](stack[-1], value)
 
 
-def main():
-    labels, instructions = loadProgram()
-    stack, variables = list(), dict()
+def printValues(stack: list, count: int, output: OutputWriter):
+    values = stack[len(stack) - count:]
+    del stack[len(stack) - count:]
+    values.reverse()
+    output.writeValues(values)
+
+
+def readValue(reader: InputReader, parser):
+    try:
+        return parser(reader.readLine())
+    except (EOFError, ValueError, UnicodeDecodeError):
+        raise InputError("Invalid type")
+
+
+def runMatch(program: Program, reader: InputReader, output: OutputWriter):
+    opcodes, operands, constants = program.opcodes, program.operands, program.constants
+    secondOperands = program.secondOperands
+    stack, variables = list(), [None] * len(program.variableNames)
     instructionIdx = 0
-    while instructionIdx < len(instructions):
-        match instructions[instructionIdx][0]:
-            case "push":
-                parameters = instructions[instructionIdx]
-                stack.append(getValueOfType(parameters[1], parameters[2], True))
-            case "pop":
+    while instructionIdx < len(opcodes):
+        match opcodes[instructionIdx]:
+            case Opcode.PUSH:
+                stack.append(constants[operands[instructionIdx]])
+            case Opcode.POP:
                 stack.pop()
-            case "load":
-                variableName = instructions[instructionIdx][1]
-                stack.append(variables[variableName])
-            case "save":
-                variableName = instructions[instructionIdx][1]            
-                variables[variableName] = stack.pop()
-            case "jmp":
-                labelId = int(instructions[instructionIdx][1])
-                instructionIdx = labels[labelId]
-            case "fjmp":
+            case Opcode.LOAD:
+                stack.append(variables[operands[instructionIdx]])
+            case Opcode.SAVE:
+                variables[operands[instructionIdx]] = stack.pop()
+            case Opcode.STORE:
+                variables[operands[instructionIdx]] = stack[-1]
+            case Opcode.JMP:
+                instructionIdx = operands[instructionIdx]
+                continue
+            case Opcode.FJMP:
+                if not stack.pop():
+                    instructionIdx = operands[instructionIdx]
+                    continue
+            case Opcode.ANDJMP:
                 if not stack[-1]:
-                    instructionIdx = labels[int(instructions[instructionIdx][1])]
+                    instructionIdx = operands[instructionIdx]
+                    continue
                 stack.pop()
-            case "print":
-                count = int(instructions[instructionIdx][1])
-                for _ in range(count):
-                    value = stack.pop()
-                    if type(value) == bool:
-                        value = str(value).lower()
-                    if type(value) == float:
-                        value = round(value, 6)
-                    print(value, end="")
-                print()
-            case "read":
-                try:
-                    stack.append(getValueOfType(instructions[instructionIdx][1], input()))
-                except:
-                    print("Error: Invalid type", file=sys.stderr)  
-                    exit(0)
-            case _:
-                handleInstruction(stack, instructions[instructionIdx])
+            case Opcode.ORJMP:
+                if stack[-1]:
+                    instructionIdx = operands[instructionIdx]
+                    continue
+                stack.pop()
+            case Opcode.PRINT:
+                printValues(stack, operands[instructionIdx], output)
+            case Opcode.READ:
+                stack.append(readValue(reader, InputReader.parsers[operands[instructionIdx]]))
+            case Opcode.CJMP:
+                value = stack.pop()
+                if not Operations.binary[secondOperands[instructionIdx]](stack.pop(), value):
+                    instructionIdx = operands[instructionIdx]
+                    continue
+            case Opcode.INC:
+                variables[operands[instructionIdx]] += constants[secondOperands[instructionIdx]]
+            case Opcode.OPC:
+                operation = Operations.binary[secondOperands[instructionIdx]]
+                stack[-1] = operation(stack[-1], constants[operands[instructionIdx]])
+            case Opcode.OPV:
+                operation = Operations.binary[secondOperands[instructionIdx]]
+                stack[-1] = operation(stack[-1], variables[operands[instructionIdx]])
+            case Opcode.RANGE:
+                step = stack.pop()
+                values = range(variables[secondOperands[instructionIdx]], stack.pop(), step)
+                if not values:
+                    instructionIdx = operands[instructionIdx]
+                    continue
+                stack.append(values[-1] + step)
+                stack.append(iter(values[1:]))
+            case Opcode.NEXT:
+                value = next(stack[-1], None)
+                if value is not None:
+                    variables[secondOperands[instructionIdx]] = value
+                    instructionIdx = operands[instructionIdx]
+                    continue
+                stack.pop()
+                variables[secondOperands[instructionIdx]] = stack.pop()
+            case opcode:
+                handleInstruction(stack, opcode)
         instructionIdx += 1
 
 
+class ThreadedHandlers:
+    unary = {Opcode.UMINUS: operator.neg, Opcode.NOT: operator.not_, Opcode.ITOF: float}
+    binary = {
+        Opcode.ADD: operator.add, Opcode.SUB: operator.sub, Opcode.MUL: operator.mul,
+        Opcode.DIV: divide, Opcode.MOD: operator.mod, Opcode.CONCAT: concat,
+        Opcode.AND: operator.and_, Opcode.OR: operator.or_,
+        Opcode.GT: operator.gt, Opcode.LT: operator.lt,
+        Opcode.EQ: operator.eq, Opcode.NE: operator.ne
+    }
+
+    def __init__(self, program: Program, reader: InputReader, output: OutputWriter):
+        self.constants = program.constants
+        self.reader, self.output = reader, output
+        self.stack, self.variables = list(), [None] * len(program.variableNames)
+
+    def build(self, opcode: int, operand: int, secondOperand: int, nextIdx: int):
+        stack, variables, reader, output = self.stack, self.variables, self.reader, self.output
+        push, pop = stack.append, stack.pop
+        match opcode:
+            case Opcode.PUSH:
+                value = self.constants[operand]
+                def handler():
+                    push(value)
+                    return nextIdx
+            case Opcode.POP:
+                def handler():
+                    pop()
+                    return nextIdx
+            case Opcode.LOAD:
+                def handler():
+                    push(variables[operand])
+                    return nextIdx
+            case Opcode.SAVE:
+                def handler():
+                    variables[operand] = pop()
+                    return nextIdx
+            case Opcode.STORE:
+                def handler():
+                    variables[operand] = stack[-1]
+                    return nextIdx
+            case Opcode.JMP:
+                def handler():
+                    return operand
+            case Opcode.FJMP:
+                def handler():
+                    return nextIdx if pop() else operand
+            case Opcode.ANDJMP:
+                def handler():
+                    if not stack[-1]:
+                        return operand
+                    pop()
+                    return nextIdx
+            case Opcode.ORJMP:
+                def handler():
+                    if stack[-1]:
+                        return operand
+                    pop()
+                    return nextIdx
+            case Opcode.PRINT:
+                def handler():
+                    printValues(stack, operand, output)
+                    return nextIdx
+            case Opcode.READ:
+                parser = InputReader.parsers[operand]
+                def handler():
+                    push(readValue(reader, parser))
+                    return nextIdx
+            case Opcode.CJMP:
+                function = ThreadedHandlers.binary[secondOperand]
+                def handler():
+                    value = pop()
+                    return nextIdx if function(pop(), value) else operand
+            case Opcode.INC:
+                step = self.constants[secondOperand]
+                def handler():
+                    variables[operand] += step
+                    return nextIdx
+            case Opcode.OPC:
+                function, value = ThreadedHandlers.binary[secondOperand], self.constants[operand]
+                def handler():
+                    stack[-1] = function(stack[-1], value)
+                    return nextIdx
+            case Opcode.OPV:
+                function = ThreadedHandlers.binary[secondOperand]
+                def handler():
+                    stack[-1] = function(stack[-1], variables[operand])
+                    return nextIdx
+            case Opcode.RANGE:
+                def handler():
+                    step = pop()
+                    values = range(variables[secondOperand], pop(), step)
+                    if not values:
+                        return operand
+                    push(values[-1] + step)
+                    push(iter(values[1:]))
+                    return nextIdx
+            case Opcode.NEXT:
+                def handler():
+                    value = next(stack[-1], None)
+                    if value is not None:
+                        variables[secondOperand] = value
+                        return operand
+                    pop()
+                    variables[secondOperand] = pop()
+                    return nextIdx
+            case _ if opcode in ThreadedHandlers.unary:
+                function = ThreadedHandlers.unary[opcode]
+                def handler():
+                    stack[-1] = function(stack[-1])
+                    return nextIdx
+            case _:
+                function = ThreadedHandlers.binary[opcode]
+                def handler():
+                    value = pop()
+                    stack[-1] = function(stack[-1], value)
+                    return nextIdx
+        return handler
+
+
+def buildHandlers(program: Program, reader: InputReader, output: OutputWriter):
+    builder = ThreadedHandlers(program, reader, output)
+    return [
+        builder.build(opcode, operand, secondOperand, idx + 1)
+        for idx, (opcode, operand, secondOperand)
+        in enumerate(zip(program.opcodes, program.operands, program.secondOperands))
+    ]
+
+
+def runThreaded(program: Program, reader: InputReader, output: OutputWriter):
+    handlers = buildHandlers(program, reader, output)
+    instructionIdx, end = 0, len(handlers)
+    while instructionIdx < end:
+        instructionIdx = handlers[instructionIdx]()
+
+
+engines = {"match": runMatch, "threaded": runThreaded}
+
+
+class Profiler:
+    def __init__(self, program: Program):
+        self.program = program
+        self.counts = [0] * len(program.opcodes)
+        self.times = [0] * len(program.opcodes)
+
+    def run(self, program: Program, reader: InputReader, output: OutputWriter):
+        handlers = buildHandlers(program, reader, output)
+        counts, times, clock = self.counts, self.times, time.perf_counter_ns
+        instructionIdx, end = 0, len(handlers)
+        while instructionIdx < end:
+            start = clock()
+            nextIdx = handlers[instructionIdx]()
+            times[instructionIdx] += clock() - start
+            counts[instructionIdx] += 1
+            instructionIdx = nextIdx
+
+    def _group(self, keys):
+        groups = dict()
+        for key, count, elapsed in zip(keys, self.counts, self.times):
+            if count:
+                totals = groups.setdefault(key, [0, 0])
+                totals[0] += count
+                totals[1] += elapsed
+        return sorted(groups.items(), key=lambda item: (-item[1][1], -item[1][0]))
+
+    def summary(self):
+        lines = self.program.lines if self.program.lines is not None else [None] * len(self.counts)
+        return {
+            "instructions": sum(self.counts),
+            "time": sum(self.times) / 1e9,
+            "lines": [
+                {"line": line, "instructions": count, "time": elapsed / 1e9}
+                for line, (count, elapsed) in self._group(lines)
+            ],
+            "opcodes": [
+                {"opcode": Opcode.names[opcode], "instructions": count, "time": elapsed / 1e9}
+                for opcode, (count, elapsed) in self._group(self.program.opcodes)
+            ]
+        }
+
+    def formatReport(self):
+        summary = self.summary()
+        total = summary["time"] or 1
+        report = [f"Profile: {summary['instructions']} instructions in {summary['time'] * 1000:.2f} ms"]
+        for key, title in (("line", "Line"), ("opcode", "Opcode")):
+            if key == "line" and self.program.lines is None:
+                report.append("No line table, compile with -g for per-line results")
+                continue
+            report.append(f"{title:>8} {'Instructions':>14} {'Time (ms)':>12} {'%':>7}")
+            for entry in summary[f"{key}s"]:
+                report.append(
+                    f"{entry[key]:>8} {entry['instructions']:>14} "
+                    f"{entry['time'] * 1000:>12.3f} {entry['time'] / total * 100:>7.1f}"
+                )
+        return "\n".join(report)
+
+    def write(self, path: str):
+        if not path:
+            print(self.formatReport(), file=sys.stderr)
+            return
+        import json
+        with open(path, "w") as profileFile:
+            json.dump(self.summary(), profileFile, indent=2)
+
+
+def selectEngine(options: dict):
+    engine = options.get("engine", "match")
+    if engine not in engines:
+        print(f"Error: unknown engine '{engine}'")
+        exit(0)
+    return engines[engine]
+
+
+def runProgram(program: Program, engine, options: dict):
+    profiler = None
+    if "profile" in options:
+        profiler = Profiler(program)
+        engine = profiler.run
+    try:
+        reader = openInput(options.get("input"))
+    except OSError:
+        print(f"File '{options['input']}' does not exist")
+        exit(0)
+    try:
+        output = openOutput(options.get("output"), options.get("flush"), int(options.get("buffer-size", 1 << 16)))
+    except OSError:
+        print(f"Can't open file '{options['output']}'")
+        exit(0)
+    except ValueError as error:
+        print(f"Error: {error}")
+        exit(0)
+    reader.output = output
+    try:
+        engine(program, reader, output)
+    except InputError as error:
+        output.flush()
+        print(f"Error: {error}", file=sys.stderr)
+        exit(0)
+    finally:
+        reader.close()
+        output.close()
+        if profiler is not None:
+            profiler.write(options["profile"])
+
+
+class Interpreter:
+    def __init__(self, program: Program, engine: str = "match"):
+        if engine not in engines:
+            raise ValueError(f"unknown engine '{engine}'")
+        self.program = program
+        self.engine = engines[engine]
+
+    def run(self, stdin = b"", stdout = None, encoding: str = "utf-8"):
+        if isinstance(stdin, io.TextIOBase):
+            stdin = stdin.buffer if hasattr(stdin, "buffer") else stdin.read()
+        if isinstance(stdin, str):
+            stdin = stdin.encode(encoding)
+        if isinstance(stdin, (bytes, bytearray)):
+            reader = InputReader(buffer=bytes(stdin), encoding=encoding)
+        else:
+            reader = InputReader(stdin, encoding=encoding)
+        if isinstance(stdout, io.TextIOBase) and hasattr(stdout, "buffer"):
+            stdout.flush()
+            stdout = stdout.buffer
+        captured = io.BytesIO() if stdout is None or isinstance(stdout, io.TextIOBase) else None
+        output = OutputWriter(captured or stdout, "size", encoding=encoding)
+        if captured is None:
+            reader.output = output
+        try:
+            self.engine(self.program, reader, output)
+        finally:
+            output.flush()
+            if captured is not None and stdout is not None:
+                stdout.write(captured.getvalue().decode(encoding))
+        if stdout is None:
+            return captured.getvalue().decode(encoding)
+
+
+def main():
+    arguments, options = parseArguments(sys.argv[1:])
+    if len(arguments) < 1:
+        print("Error: Program file not specified")
+        exit(0)
+    engine = selectEngine(options)
+    program = loadProgram(arguments[0])
+    runProgram(program, engine, options)
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,33 @@
+import io
+import threading
+from contextlib import redirect_stderr
+from bytecode import Program, readProgram
+from compiler import compileProgram
+from interpreter import InputError, Interpreter
+
+
+
+class CompileError(Exception):
+    def __init__(self, messages: list[str]):
+        super().__init__("\n".join(messages))
+        self.messages = messages
+
+
+compileLock = threading.Lock()
+
+
+def compileSource(source: str, options: dict = None):
+    options = dict(options or {})
+    stderr = io.StringIO()
+    with compileLock, redirect_stderr(stderr):
+        messages, program = compileProgram(source, options)
+    if program is None:
+        raise CompileError(stderr.getvalue().splitlines() + messages)
+    return program
+
+
+def loadProgram(path: str):
+    try:
+        return readProgram(path)
+    except (KeyError, IndexError, ValueError) as error:
+        raise ValueError(f"File '{path}' is not a valid program") from error
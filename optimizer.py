@@ -0,0 +1,498 @@
+stackEffects = {
+    "push": (0, 1), "pop": (1, 0), "load": (0, 1), "store": (1, 1),
+    "uminus": (1, 1), "not": (1, 1), "itof": (1, 1),
+    "add": (2, 1), "sub": (2, 1), "mul": (2, 1), "div": (2, 1), "mod": (2, 1),
+    "concat": (2, 1), "and": (2, 1), "or": (2, 1),
+    "gt": (2, 1), "lt": (2, 1), "eq": (2, 1), "ne": (2, 1)
+}
+pureInstructions = set(stackEffects) - {"pop", "store", "div", "mod"}
+branchInstructions = {"jmp", "fjmp", "andjmp", "orjmp"}
+conditionalBranches = branchInstructions - {"jmp"}
+
+
+def _split(instruction: str):
+    return instruction.split(" ", maxsplit=2)
+
+
+def _findShortCircuit(instructions: list, labelIdx: int):
+    label = _split(instructions[labelIdx])[1]
+    for idx in range(labelIdx - 1, -1, -1):
+        if instructions[idx] in (f"andjmp {label}", f"orjmp {label}"):
+            return idx
+    return None
+
+
+def _findExpressionStart(instructions: list, end: int):
+    produced, idx = 0, end
+    while idx > 0:
+        idx -= 1
+        if instructions[idx] is None:
+            continue
+        parameters = _split(instructions[idx])
+        if parameters[0] == "label":
+            idx = _findShortCircuit(instructions, idx)
+            if idx is None:
+                return None
+            continue
+        effect = stackEffects.get(parameters[0])
+        if effect is None:
+            return None
+        produced += effect[1] - effect[0]
+        if produced == 1:
+            return idx
+    return None
+
+
+def _isPure(instructions: list, start: int, end: int):
+    return all(
+        instruction is None or _split(instruction)[0] in pureInstructions
+        for instruction in instructions[start:end]
+    )
+
+
+def _rewrite(instructions: list[str]):
+    result = list()
+    idx = 0
+    while idx < len(instructions):
+        instruction = instructions[idx]
+        parameters = _split(instruction)
+        following = instructions[idx + 1:idx + 3]
+        if (parameters[0] == "save" and len(following) == 2 and following[0] == "pop"
+                and following[1] == f"load {parameters[1]} {parameters[2]}"):
+            start = _findExpressionStart(result, len(result))
+            lvalue = None
+            if start is not None:
+                lvalue = next((i for i in range(start - 1, -1, -1) if result[i] is not None), None)
+            if lvalue is not None and result[lvalue] == following[1]:
+                result[lvalue] = None
+                result.append(f"store {parameters[1]} {parameters[2]}")
+                idx += 3
+                continue
+        if parameters[0] == "pop" and result and result[-1] is not None:
+            previous = _split(result[-1])
+            if previous[0] == "store":
+                result[-1] = f"save {previous[1]} {previous[2]}"
+                idx += 1
+                continue
+            start = _findExpressionStart(result, len(result))
+            if start is not None and _isPure(result, start, len(result)):
+                del result[start:]
+                idx += 1
+                continue
+        if instruction == "not" and result and result[-1] == "eq":
+            result[-1] = "ne"
+            idx += 1
+            continue
+        result.append(instruction)
+        idx += 1
+    return [instruction for instruction in result if instruction is not None]
+
+
+def _findOverwrittenSaves(instructions: list[str]):
+    overwrittenSaves, overwritten = set(), set()
+    for idx in range(len(instructions) - 1, -1, -1):
+        parameters = _split(instructions[idx])
+        if parameters[0] == "label" or parameters[0] in branchInstructions:
+            overwritten.clear()
+        elif parameters[0] == "load":
+            overwritten.discard(parameters[1])
+        elif parameters[0] in ("save", "store"):
+            if parameters[0] == "save" and parameters[1] in overwritten:
+                overwrittenSaves.add(idx)
+            overwritten.add(parameters[1])
+    return overwrittenSaves
+
+
+def _removeDeadDeclarations(instructions: list[str]):
+    overwrittenSaves = _findOverwrittenSaves(instructions)
+    result = list()
+    for idx, instruction in enumerate(instructions):
+        if idx in overwrittenSaves and result and result[-1].startswith("push "):
+            result.pop()
+            continue
+        result.append(instruction)
+    return result
+
+
+def peephole(instructions: list[str]):
+    return _removeDeadDeclarations(_rewrite(instructions))
+
+
+fusableOperations = {"add", "sub", "mul", "div", "mod", "concat", "and", "or", "gt", "lt", "eq", "ne"}
+comparisonOperations = {"gt", "lt", "eq", "ne"}
+
+
+def _fuseIncrement(instructions: list[str], idx: int):
+    window = instructions[idx:idx + 4]
+    if len(window) < 4 or not window[1].startswith("push int ") or window[2] not in ("add", "sub"):
+        return None
+    variable = _split(window[0])
+    if variable[0] != "load" or window[3] != f"save {variable[1]} {variable[2]}":
+        return None
+    step = int(_split(window[1])[2])
+    if window[2] == "sub":
+        step = -step
+    return f"inc {variable[1]} {variable[2]} {step}"
+
+
+def fuse(instructions: list[str]):
+    result = list()
+    idx = 0
+    while idx < len(instructions):
+        instruction = instructions[idx]
+        following = instructions[idx + 1] if idx + 1 < len(instructions) else ""
+        parameters = _split(instruction)
+        increment = _fuseIncrement(instructions, idx)
+        if increment is not None:
+            result.append(increment)
+            idx += 4
+        elif instruction in comparisonOperations and following.startswith("fjmp "):
+            result.append(f"cjmp {instruction} {_split(following)[1]}")
+            idx += 2
+        elif parameters[0] == "push" and following in fusableOperations:
+            result.append(f"opc {following} {parameters[1]} {parameters[2]}")
+            idx += 2
+        elif parameters[0] == "load" and following in fusableOperations:
+            result.append(f"opv {following} {parameters[1]} {parameters[2]}")
+            idx += 2
+        else:
+            result.append(instruction)
+            idx += 1
+    return result
+
+
+def compactLines(instructions: list[str]):
+    result, pending, current = list(), None, None
+    for instruction in instructions:
+        if instruction.startswith("line "):
+            pending = instruction
+            continue
+        if pending is not None and not instruction.startswith("label "):
+            if pending != current:
+                result.append(pending)
+                current = pending
+            pending = None
+        result.append(instruction)
+    return result
+
+
+variableInstructions = {"load", "save", "store"}
+constantConditions = {"push bool true": True, "push bool false": False}
+
+
+class DeadCodeStats:
+    def __init__(self):
+        self.unreachable = 0
+        self.deadStores = 0
+        self.unusedVariables = list()
+
+    def format(self):
+        variables = ""
+        if self.unusedVariables:
+            variables = f" ({', '.join(self.unusedVariables)})"
+        return (
+            f"Dead code elimination removed {self.unreachable} unreachable instructions, "
+            f"{self.deadStores} dead stores and {len(self.unusedVariables)} unused variables{variables}"
+        )
+
+
+def _isMarker(instruction: str):
+    return instruction.startswith("label ") or instruction.startswith("line ")
+
+
+def _foldBranches(instructions: list[str]):
+    result = list()
+    for instruction in instructions:
+        parameters = _split(instruction)
+        if parameters[0] in conditionalBranches and result and result[-1] in constantConditions:
+            jumps = constantConditions[result[-1]] == (parameters[0] == "orjmp")
+            if parameters[0] == "fjmp" or not jumps:
+                result.pop()
+            if jumps:
+                result.append(f"jmp {parameters[1]}")
+            continue
+        result.append(instruction)
+    return result
+
+
+def _buildBlocks(instructions: list[str]):
+    blocks, current = list(), list()
+    for instruction in instructions:
+        if instruction.startswith("label ") and not all(_isMarker(item) for item in current):
+            markers = list()
+            while current[-1].startswith("line "):
+                markers.insert(0, current.pop())
+            blocks.append(current)
+            current = markers
+        current.append(instruction)
+        if _split(instruction)[0] in branchInstructions:
+            blocks.append(current)
+            current = list()
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def _successors(blocks: list[list[str]]):
+    labelBlocks = {
+        _split(instruction)[1]: idx
+        for idx, block in enumerate(blocks) for instruction in block if instruction.startswith("label ")
+    }
+    successors = list()
+    for idx, block in enumerate(blocks):
+        parameters = _split(block[-1])
+        following = [idx + 1] if idx + 1 < len(blocks) else []
+        if parameters[0] == "jmp":
+            successors.append([labelBlocks[parameters[1]]])
+        elif parameters[0] in conditionalBranches:
+            successors.append(following + [labelBlocks[parameters[1]]])
+        else:
+            successors.append(following)
+    return successors
+
+
+def _removeUnreachable(instructions: list[str], stats: DeadCodeStats):
+    blocks = _buildBlocks(instructions)
+    successors = _successors(blocks)
+    reachable, pending = set(), [0] if blocks else []
+    while pending:
+        idx = pending.pop()
+        if idx not in reachable:
+            reachable.add(idx)
+            pending.extend(successors[idx])
+    result = list()
+    for idx, block in enumerate(blocks):
+        if idx in reachable:
+            result.extend(block)
+        else:
+            stats.unreachable += sum(not _isMarker(instruction) for instruction in block)
+    return result
+
+
+def _removeRedundantJumps(instructions: list[str]):
+    result, labels = list(), set()
+    for instruction in reversed(instructions):
+        parameters = _split(instruction)
+        if parameters[0] == "jmp" and parameters[1] in labels:
+            labels = set()
+            continue
+        if not _isMarker(instruction):
+            labels = set()
+        elif parameters[0] == "label":
+            labels.add(parameters[1])
+        result.append(instruction)
+    result.reverse()
+    targets = {_split(instruction)[1] for instruction in result if _split(instruction)[0] in branchInstructions}
+    return [
+        instruction for instruction in result
+        if not instruction.startswith("label ") or _split(instruction)[1] in targets
+    ]
+
+
+def _removeDeadStores(instructions: list[str], stats: DeadCodeStats):
+    blocks = _buildBlocks(instructions)
+    successors = _successors(blocks)
+    uses, definitions = list(), list()
+    for block in blocks:
+        used, defined = set(), set()
+        for instruction in reversed(block):
+            parameters = _split(instruction)
+            if parameters[0] == "load":
+                used.add(parameters[1])
+                defined.discard(parameters[1])
+            elif parameters[0] in ("save", "store"):
+                defined.add(parameters[1])
+                used.discard(parameters[1])
+        uses.append(used)
+        definitions.append(defined)
+    liveIn = [set() for _ in blocks]
+    changed = True
+    while changed:
+        changed = False
+        for idx in range(len(blocks) - 1, -1, -1):
+            liveOut = set().union(*(liveIn[successor] for successor in successors[idx]))
+            live = uses[idx] | (liveOut - definitions[idx])
+            if live != liveIn[idx]:
+                liveIn[idx] = live
+                changed = True
+    result = list()
+    for idx, block in enumerate(blocks):
+        live = set().union(*(liveIn[successor] for successor in successors[idx]))
+        rewritten = list()
+        for instruction in reversed(block):
+            parameters = _split(instruction)
+            if parameters[0] == "load":
+                live.add(parameters[1])
+            elif parameters[0] in ("save", "store"):
+                if parameters[1] not in live:
+                    stats.deadStores += 1
+                    if parameters[0] == "save":
+                        rewritten.append("pop")
+                    continue
+                live.discard(parameters[1])
+            rewritten.append(instruction)
+        result.extend(reversed(rewritten))
+    return result
+
+
+def _renumberVariables(instructions: list[str], variableNames: dict, stats: DeadCodeStats):
+    slots = dict()
+    result = list()
+    for instruction in instructions:
+        parameters = _split(instruction)
+        if parameters[0] in variableInstructions:
+            slot = slots.setdefault(parameters[1], str(len(slots)))
+            instruction = f"{parameters[0]} {slot} {parameters[2]}"
+        result.append(instruction)
+    stats.unusedVariables = [name for slot, name in sorted(variableNames.items()) if str(slot) not in slots]
+    return result
+
+
+def eliminateDeadCode(instructions: list[str], variableNames: dict):
+    stats = DeadCodeStats()
+    instructions = _foldBranches(instructions)
+    while True:
+        previous = instructions
+        instructions = _removeRedundantJumps(_removeUnreachable(instructions, stats))
+        instructions = _rewrite(_removeDeadStores(instructions, stats))
+        if instructions == previous:
+            break
+    return _renumberVariables(instructions, variableNames, stats), stats
+
+
+controlInstructions = branchInstructions | {"label", "line"}
+loopEffects = dict(
+    stackEffects, save=(1, 0), read=(0, 1), jmp=(0, 0), fjmp=(1, 0), andjmp=(1, 0), orjmp=(1, 0),
+    label=(0, 0), line=(0, 0)
+)
+
+
+def _findInvariants(instructions: list[str], start: int, end: int, modified: set):
+    stack, candidates = list(), list()
+    for idx in range(start, end):
+        parameters = _split(instructions[idx])
+        effect = (int(parameters[1]), 0) if parameters[0] == "print" else loopEffects.get(parameters[0])
+        if effect is None or len(stack) < effect[0]:
+            return list()
+        operands = stack[len(stack) - effect[0]:]
+        del stack[len(stack) - effect[0]:]
+        if parameters[0] == "load":
+            invariant = parameters[1] not in modified
+        elif parameters[0] == "push":
+            invariant = True
+        else:
+            invariant = bool(operands) and parameters[0] in pureInstructions and all(item[1] for item in operands)
+        if not invariant and any(item[1] and not item[2] for item in operands):
+            ends = [item[0] for item in operands[1:]] + [idx]
+            candidates.extend(
+                (begin, operandEnd) for (begin, operandInvariant, leaf), operandEnd in zip(operands, ends)
+                if operandInvariant and not leaf
+            )
+        if effect[1]:
+            stack.append((operands[0][0] if operands else idx, invariant, not operands))
+        if parameters[0] in controlInstructions:
+            stack = [(begin, False, leaf) for begin, _, leaf in stack]
+    return sorted(candidates)
+
+
+def _findLoopRanges(instructions: list[str]):
+    positions, loops = dict(), dict()
+    for idx, instruction in enumerate(instructions):
+        parameters = _split(instruction)
+        if parameters[0] == "label":
+            positions[parameters[1]] = idx
+        elif parameters[0] == "jmp" and parameters[1] in positions and parameters[1] not in loops:
+            loops[parameters[1]] = (positions[parameters[1]], idx)
+    return sorted(loops.values())
+
+
+def hoistInvariants(instructions: list[str]):
+    slots = [int(_split(instruction)[1]) for instruction in instructions if _split(instruction)[0] in variableInstructions]
+    nextSlot, hoisted = max(slots, default=-1) + 1, 0
+    replacements, preheaders = dict(), dict()
+    for header, backEdge in _findLoopRanges(instructions):
+        body, spans, idx = list(), list(), header + 1
+        while idx < backEdge:
+            end, instruction = replacements.get(idx, (idx + 1, instructions[idx]))
+            body.append(instruction)
+            spans.append((idx, end))
+            idx = end
+        modified = {_split(instruction)[1] for instruction in body if _split(instruction)[0] in ("save", "store")}
+        candidates = _findInvariants(body, 0, len(body), modified)
+        preheader, temporaries = preheaders.setdefault(header, list()), dict()
+        for begin, end in candidates:
+            expression = tuple(body[begin:end])
+            if expression not in temporaries:
+                temporaries[expression] = f"{nextSlot} $t{nextSlot}"
+                nextSlot += 1
+                preheader.extend(expression)
+                preheader.append(f"save {temporaries[expression]}")
+            replacements[spans[begin][0]] = (spans[end - 1][1], f"load {temporaries[expression]}")
+        hoisted += len(candidates)
+    result, idx = list(), 0
+    while idx < len(instructions):
+        result.extend(preheaders.get(idx, ()))
+        idx, instruction = replacements.get(idx, (idx + 1, instructions[idx]))
+        result.append(instruction)
+    return result, hoisted
+
+
+def _matchCountedLoop(instructions: list[str], header: int, backEdge: int):
+    condition = [_split(instruction) for instruction in instructions[header + 1:header + 5]]
+    if (len(condition) < 4 or condition[0][0] != "load" or condition[2][0] not in ("lt", "gt")
+            or condition[3][0] != "fjmp" or instructions[backEdge + 1:backEdge + 2] != [f"label {condition[3][1]}"]):
+        return None
+    bound = condition[1]
+    if bound[0] != "load" and bound[:2] != ["push", "int"]:
+        return None
+    update = list()
+    for idx in range(backEdge - 1, header + 4, -1):
+        if not instructions[idx].startswith("line "):
+            update.append(idx)
+            if len(update) == 4:
+                break
+    else:
+        return None
+    variable = f"{condition[0][1]} {condition[0][2]}"
+    load, step, operation, save = (instructions[idx] for idx in reversed(update))
+    if (load != f"load {variable}" or not step.startswith("push int ") or operation not in ("add", "sub")
+            or save != f"save {variable}"):
+        return None
+    step = int(_split(step)[2]) * (1 if operation == "add" else -1)
+    if step == 0 or (step > 0) != (condition[2][0] == "lt"):
+        return None
+    protected = {condition[0][1], bound[1] if bound[0] == "load" else None}
+    label = _split(instructions[header])[1]
+    for instruction in instructions[header + 5:update[-1]]:
+        parameters = _split(instruction)
+        if parameters[0] in ("save", "store") and parameters[1] in protected:
+            return None
+        if parameters[0] in branchInstructions and parameters[1] == label:
+            return None
+    return variable, " ".join(bound), step, condition[3][1], update[-1]
+
+
+def convertCountedLoops(instructions: list[str]):
+    labels = [int(_split(instruction)[1]) for instruction in instructions if instruction.startswith("label ")]
+    nextLabel, converted = max(labels, default=-1) + 1, 0
+    replacements = dict()
+    for header, backEdge in _findLoopRanges(instructions):
+        loop = _matchCountedLoop(instructions, header, backEdge)
+        if loop is None:
+            continue
+        variable, bound, step, exitLabel, update = loop
+        replacements[header] = (
+            header + 5, [bound, f"push int {step}", f"range {variable} {exitLabel}", f"label {nextLabel}"]
+        )
+        replacements[update] = (backEdge + 1, [f"next {variable} {nextLabel}"])
+        nextLabel += 1
+        converted += 1
+    result, idx = list(), 0
+    while idx < len(instructions):
+        if idx in replacements:
+            idx, replacement = replacements[idx]
+            result.extend(replacement)
+        else:
+            result.append(instructions[idx])
+            idx += 1
+    return result, converted
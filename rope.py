@@ -0,0 +1,49 @@
+ropeThreshold = 64
+
+
+class Rope:
+    __slots__ = ("parts", "count", "length", "text")
+
+    def __init__(self, parts: list, count: int, length: int):
+        self.parts = parts
+        self.count = count
+        self.length = length
+        self.text = None
+
+    def append(self, value: str):
+        parts = self.parts
+        if len(parts) != self.count:
+            parts = parts[:self.count]
+        parts.append(value)
+        return Rope(parts, self.count + 1, self.length + len(value))
+
+    def __str__(self):
+        if self.text is None:
+            parts = self.parts if len(self.parts) == self.count else self.parts[:self.count]
+            self.text = "".join(parts)
+        return self.text
+
+    def __len__(self):
+        return self.length
+
+    def __eq__(self, other):
+        return str(self) == str(other)
+
+    def __ne__(self, other):
+        return str(self) != str(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __repr__(self):
+        return f"Rope({str(self)!r})"
+
+
+def concat(a, b):
+    if type(b) is Rope:
+        b = str(b)
+    if type(a) is Rope:
+        return a.append(b)
+    if len(a) + len(b) < ropeThreshold:
+        return a + b
+    return Rope([a, b], 2, len(a) + len(b))
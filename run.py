@@ -0,0 +1,50 @@
+import time
+startTime = time.perf_counter()
+import sys
+from cli import parseArguments
+from compiler import compileProgram
+from interpreter import runProgram, selectEngine
+
+
+
+defaultStartupBudget = 50
+
+
+def reportStartup(importsEnd: float, compileEnd: float, budget: float):
+    total = (compileEnd - startTime) * 1000
+    imports, compiling = (importsEnd - startTime) * 1000, (compileEnd - importsEnd) * 1000
+    verdict = "within" if total <= budget else "over"
+    print(
+        f"Startup: {total:.1f} ms (imports {imports:.1f} ms, compile {compiling:.1f} ms), "
+        f"{verdict} the {budget:g} ms budget",
+        file=sys.stderr
+    )
+
+
+def main():
+    importsEnd = time.perf_counter()
+    arguments, options = parseArguments(sys.argv[1:])
+    if "profile" in options:
+        options.setdefault("g", "")
+    if len(arguments) < 1:
+        print("Error: Source file not specified")
+        exit(0)
+    engine = selectEngine(options)
+    try:
+        with open(arguments[0]) as sourceFile:
+            source = sourceFile.read()
+    except OSError:
+        print(f"File '{arguments[0]}' does not exist")
+        exit(0)
+    messages, program = compileProgram(source, options)
+    for message in messages:
+        print(message, file=sys.stderr)
+    if program is None:
+        exit(0)
+    if "startup-budget" in options:
+        reportStartup(importsEnd, time.perf_counter(), float(options["startup-budget"] or defaultStartupBudget))
+    runProgram(program, engine, options)
+
+
+if __name__ == '__main__':
+    main()
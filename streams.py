@@ -0,0 +1,113 @@
+import mmap
+import sys
+from rope import Rope
+
+
+
+outputFormatters = {
+    bool: lambda value: "true" if value else "false",
+    float: lambda value: str(round(value, 6)),
+    int: str,
+    str: str,
+    Rope: str
+}
+
+
+class OutputWriter:
+    flushPolicies = ["line", "size", "exit"]
+
+    def __init__(self, stream, flushPolicy: str, bufferSize: int = 1 << 16, encoding: str = "utf-8", errors: str = "strict"):
+        self.stream = stream
+        self.flushPolicy = flushPolicy
+        self.bufferSize = bufferSize
+        self.encoding, self.errors = encoding, errors
+        self.parts, self.size = list(), 0
+
+    def writeValues(self, values: list):
+        line = "".join([outputFormatters[type(value)](value) for value in values])
+        data = f"{line}\n".encode(self.encoding, self.errors)
+        self.parts.append(data)
+        self.size += len(data)
+        if self.flushPolicy == "line" or (self.flushPolicy == "size" and self.size >= self.bufferSize):
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(b"".join(self.parts))
+            self.parts.clear()
+            self.size = 0
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        if self.stream is not sys.stdout.buffer:
+            self.stream.close()
+
+
+def parseBool(text: str):
+    if text == "true":
+        return True
+    elif text == "false":
+        return False
+    raise ValueError()
+
+
+class InputReader:
+    parsers = [int, float, parseBool, str]
+
+    def __init__(self, stream = None, buffer = b"", chunkSize: int = 1 << 16, encoding: str = "utf-8", errors: str = "strict"):
+        self.stream = stream
+        self.buffer, self.position = buffer, 0
+        self.chunkSize = chunkSize
+        self.encoding, self.errors = encoding, errors
+        self.output = None
+
+    def _fill(self):
+        if self.stream is not None and self.output is not None:
+            self.output.flush()
+        chunk = self.stream.read1(self.chunkSize) if self.stream is not None else b""
+        if not chunk:
+            self.stream = None
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def readLine(self):
+        end = self.buffer.find(b"\n", self.position)
+        while end < 0:
+            searched = len(self.buffer) - self.position
+            if not self._fill():
+                break
+            end = self.buffer.find(b"\n", searched)
+        if end < 0:
+            if self.position >= len(self.buffer):
+                raise EOFError()
+            end = len(self.buffer)
+        line = self.buffer[self.position:end]
+        self.position = end + 1
+        return line.decode(self.encoding, self.errors)
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+
+def openInput(path: str = None):
+    if path is None:
+        return InputReader(sys.stdin.buffer, encoding=sys.stdin.encoding, errors=sys.stdin.errors)
+    with open(path, "rb") as inputFile:
+        buffer = b""
+        if inputFile.seek(0, 2) > 0:
+            buffer = mmap.mmap(inputFile.fileno(), 0, access=mmap.ACCESS_READ)
+    return InputReader(buffer=buffer, encoding=sys.stdin.encoding, errors=sys.stdin.errors)
+
+
+def openOutput(path: str = None, flushPolicy: str = None, bufferSize: int = 1 << 16):
+    sys.stdout.flush()
+    stream = sys.stdout.buffer if path is None else open(path, "wb")
+    if flushPolicy is None:
+        flushPolicy = "line" if stream.isatty() or sys.stdin.isatty() else "size"
+    if flushPolicy not in OutputWriter.flushPolicies:
+        raise ValueError(f"unknown flush policy '{flushPolicy}'")
+    return OutputWriter(stream, flushPolicy, bufferSize, sys.stdout.encoding, sys.stdout.errors)